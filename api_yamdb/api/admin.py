@@ -1,11 +1,18 @@
 from django.contrib import admin
 
 from reviews.models import Category, Comment, Genre, GenreTitle, Review, Title
-from users.models import User
+from users.models import QueuedEmail, User
 
 admin.site.register(User)
 
 
+@admin.register(QueuedEmail)
+class QueuedEmailAdmin(admin.ModelAdmin):
+    list_display = ('to', 'subject', 'status', 'attempts', 'next_attempt_at')
+    search_fields = ('to',)
+    list_filter = ('status',)
+
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'slug')
@@ -8,5 +8,6 @@ class ApiConfig(AppConfig):
     verbose_name = 'Отзывы'
 
     def ready(self):
+        from . import read_model  # noqa: F401
         from .setup_roles import setup_roles
         post_migrate.connect(setup_roles, sender=self)
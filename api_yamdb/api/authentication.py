@@ -0,0 +1,105 @@
+"""Аутентификация по JWT без чтения пользователя из базы.
+
+`TokenView` записывает в токен id, username, роль, признак суперпользователя
+и версию токенов. Для такого токена `StatelessJWTAuthentication` собирает
+экземпляр `User` из claims: остальные поля отложены и читаются из базы
+только при обращении к ним, целиком модель загружает `full_user`.
+Токен отзывается увеличением `User.token_version`; для токенов без версии
+пользователь, как в `JWTAuthentication`, загружается целиком, но через
+`user_cache`.
+"""
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from users.cache import user_cache
+from users.tokens import current_token_version
+
+User = get_user_model()
+
+TOKEN_VERSION_CLAIM = 'ver'
+# Поля пользователя, которые переносятся в токен под теми же именами.
+USER_CLAIMS = ('username', 'role', 'is_superuser')
+
+
+def tokens_for_user(user):
+    """Refresh-токен с claims пользователя; access-токен их копирует."""
+    refresh = RefreshToken.for_user(user)
+    for claim in USER_CLAIMS:
+        refresh[claim] = getattr(user, claim)
+    refresh[TOKEN_VERSION_CLAIM] = user.token_version
+    return refresh
+
+
+def full_user(user, force_check=False):
+    """Догружаем отложенные поля пользователя из `user_cache`.
+
+    Перед изменением пользователя нужен `force_check`: поля читаются
+    из базы, даже если пользователь уже загружен целиком из кэша.
+    """
+    deferred = user.get_deferred_fields()
+    if not deferred and not force_check:
+        return user
+    loaded = user_cache.by_id(user.pk, force_check=force_check)
+    if loaded is None:
+        raise AuthenticationFailed(
+            'Пользователь не найден.', code='user_not_found'
+        )
+    if not deferred:
+        return loaded
+    for field in deferred:
+        setattr(user, field, getattr(loaded, field))
+    return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """Пользователь собирается из claims токена без запроса к базе."""
+
+    def get_user(self, validated_token):
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            return self.get_cached_user(validated_token)
+        try:
+            values = {
+                claim: validated_token[claim] for claim in USER_CLAIMS
+            }
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Токен не содержит данных пользователя.')
+        version = validated_token[TOKEN_VERSION_CLAIM]
+        if current_token_version(user_id) != version:
+            raise AuthenticationFailed(
+                'Токен отозван.', code='token_revoked'
+            )
+        values.update({
+            api_settings.USER_ID_FIELD: user_id,
+            'is_active': True,
+            'token_version': version,
+        })
+        # from_db ждёт значения в порядке полей модели.
+        fields = [
+            field.attname for field in User._meta.concrete_fields
+            if field.attname in values
+        ]
+        return User.from_db(
+            DEFAULT_DB_ALIAS, fields, [values[field] for field in fields]
+        )
+
+    def get_cached_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Токен не содержит данных пользователя.')
+        user = user_cache.by_id(user_id)
+        if user is None:
+            raise AuthenticationFailed(
+                'Пользователь не найден.', code='user_not_found'
+            )
+        if not user.is_active:
+            raise AuthenticationFailed(
+                'Пользователь заблокирован.', code='user_inactive'
+            )
+        return user
@@ -0,0 +1,87 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from reviews.versions import current_versions, version_keys
+
+KEY_PREFIX = 'response'
+CACHE_HEADER = 'X-Cache'
+
+
+def normalized_url(request):
+    """Хост, путь и параметры запроса в порядке сортировки."""
+    params = '&'.join(
+        f'{key}={value}'
+        for key in sorted(request.query_params)
+        for value in sorted(request.query_params.getlist(key))
+    )
+    return f'{request.get_host()}{request.path}?{params}'
+
+
+class VersionedCacheMixin:
+    """Кэш ответов GET list/retrieve, проверяемый по версиям моделей.
+
+    Запись хранит отрендеренный ответ и версии моделей из `cache_models`
+    на момент рендера. Попадание стоит одного `get_many`: запись и
+    текущие версии читаются вместе и сравниваются. Ключ строится из
+    хоста, пути, отсортированных параметров запроса и формата ответа.
+    """
+
+    cache_models = ()
+    cache_actions = ('list', 'retrieve')
+    cache_formats = ('json',)
+
+    def is_cacheable(self, request):
+        return (
+            request.method == 'GET'
+            and self.action in self.cache_actions
+            and request.accepted_renderer.format in self.cache_formats
+        )
+
+    def get_cache_key(self, request):
+        digest = hashlib.md5(normalized_url(request).encode()).hexdigest()
+        return f'{KEY_PREFIX}:{request.accepted_renderer.format}:{digest}'
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.cache_key = None
+        self.cached_response = None
+        if self.is_cacheable(request):
+            self.cache_key = self.get_cache_key(request)
+            self.version_keys = version_keys(self.cache_models)
+            found = cache.get_many([self.cache_key, *self.version_keys])
+            self.versions = [found.get(key) for key in self.version_keys]
+            if None in self.versions:
+                self.versions = current_versions(self.cache_models)
+            entry = found.get(self.cache_key)
+            if entry is not None and entry[0] == self.versions:
+                self.cached_response = entry[1:]
+                # dispatch() выбирает обработчик после initial().
+                self.get = self.respond_from_cache
+
+    def respond_from_cache(self, request, *args, **kwargs):
+        content, content_type = self.cached_response
+        response = HttpResponse(content, content_type=content_type)
+        response[CACHE_HEADER] = 'HIT'
+        return response
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if (
+            getattr(self, 'cache_key', None)
+            and getattr(self, 'cached_response', None) is None
+            and response.status_code == 200
+        ):
+            if hasattr(response, 'render'):
+                response.render()
+            cache.set(
+                self.cache_key,
+                (self.versions, response.content, response['Content-Type']),
+                settings.RESPONSE_CACHE_TIMEOUT
+            )
+            response[CACHE_HEADER] = 'MISS'
+        return response
@@ -0,0 +1,94 @@
+import hashlib
+import math
+import time
+
+from django.http import HttpResponseNotModified
+from django.utils.http import http_date, parse_http_date_safe
+
+from api.cache import normalized_url
+from reviews.versions import current_versions, last_modified
+
+
+class ConditionalGetMixin:
+    """Условные GET по ETag и Last-Modified из версий моделей.
+
+    Валидаторы вычисляются в `get_validators`, по умолчанию по версиям
+    моделей из `etag_models` без обращения к базе и сериализатору. При
+    совпадении `If-None-Match` (или, если его нет, `If-Modified-Since`)
+    на GET и HEAD отвечаем 304.
+    Last-Modified не отдаётся, пока не закончилась секунда последнего
+    изменения: иначе изменение в ту же секунду осталось бы незамеченным.
+    """
+
+    etag_models = ()
+    conditional_actions = ('list', 'retrieve')
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = self.last_modified = None
+        if (
+            request.method not in ('GET', 'HEAD')
+            or self.action not in self.conditional_actions
+        ):
+            return
+        versions, modified = self.get_validators()
+        fingerprint = (
+            f'{request.accepted_renderer.format}|{normalized_url(request)}|'
+            f'{versions}'
+        )
+        self.etag = f'"{hashlib.md5(fingerprint.encode()).hexdigest()}"'
+        if modified is not None and math.ceil(modified) <= time.time():
+            self.last_modified = math.ceil(modified)
+        if self.is_not_modified(request):
+            # HEAD вьюсета обслуживает тот же обработчик, что и GET.
+            setattr(self, request.method.lower(), self.respond_not_modified)
+
+    def get_validators(self):
+        """Данные для ETag и время изменения для Last-Modified."""
+        return (
+            current_versions(self.etag_models),
+            last_modified(self.etag_models)
+        )
+
+    def scoped_validators(self, model, scope, *parts):
+        """Валидаторы по версии строк `model` из области `scope`.
+
+        К ним добавляются версии `etag_models` и значения `parts`.
+        """
+        versions = (
+            current_versions((model,), scope)
+            + current_versions(self.etag_models)
+        )
+        modified = (
+            last_modified((model,), scope), last_modified(self.etag_models)
+        )
+        return (
+            [*parts, *versions], None if None in modified else max(modified)
+        )
+
+    def is_not_modified(self, request):
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match is not None:
+            etags = [etag.strip() for etag in if_none_match.split(',')]
+            return self.etag in etags or '*' in etags
+        if_modified_since = parse_http_date_safe(
+            request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+        )
+        return (
+            self.last_modified is not None
+            and if_modified_since is not None
+            and self.last_modified <= if_modified_since
+        )
+
+    def respond_not_modified(self, request, *args, **kwargs):
+        return HttpResponseNotModified()
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        if getattr(self, 'etag', None) and response.status_code in (200, 304):
+            response['ETag'] = self.etag
+            if self.last_modified is not None:
+                response['Last-Modified'] = http_date(self.last_modified)
+        return response
@@ -1,27 +1,115 @@
 import django_filters
 
-from reviews.models import Title
+from reviews.models import Category, Genre, GenreTitle, Title
+from reviews.search import search_titles
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+DECADE = 10
+
+
+class TitleOrderingFilter(django_filters.OrderingFilter):
+    """Сортировка по хранимым колонкам с id для устойчивых страниц.
+
+    Направление id совпадает с направлением последнего поля, поэтому
+    составной индекс (поле, id) читается целиком в одну сторону.
+    """
+
+    def filter(self, qs, value):
+        qs = super().filter(qs, value)
+        if value:
+            ordering = qs.query.order_by
+            tie_breaker = '-id' if ordering[-1].startswith('-') else 'id'
+            qs = qs.order_by(*ordering, tie_breaker)
+        return qs
+
+
+class SlugListFilter(django_filters.BaseInFilter, django_filters.CharFilter):
+    """Точное совпадение slug, несколько значений через запятую."""
+
+
+def slug_ids(model, slugs):
+    """id объектов по slug одним запросом, неизвестные slug пропускаются."""
+    return list(
+        model.objects.filter(slug__in=slugs).order_by()
+        .values_list('pk', flat=True)
+    )
+
+
+def genre_title_ids(genre_ids):
+    return GenreTitle.objects.filter(
+        genre_id__in=genre_ids
+    ).values('title_id')
 
 
 class TitleFilter(django_filters.FilterSet):
 
-    year = django_filters.NumberFilter(
+    year = django_filters.NumberFilter(field_name='year')
+    year_min = django_filters.NumberFilter(
         field_name='year',
-        lookup_expr='icontains'
+        lookup_expr='gte'
+    )
+    year_max = django_filters.NumberFilter(
+        field_name='year',
+        lookup_expr='lte'
     )
+    decade = django_filters.NumberFilter(method='filter_decade')
     name = django_filters.CharFilter(
         field_name='name',
         lookup_expr='icontains'
     )
-    category = django_filters.CharFilter(
-        field_name='category__slug',
-        lookup_expr='icontains'
+    category = SlugListFilter(method='filter_category')
+    genre = SlugListFilter(method='filter_genre')
+    genre_match = django_filters.ChoiceFilter(
+        choices=((MATCH_ANY, MATCH_ANY), (MATCH_ALL, MATCH_ALL)),
+        method='filter_genre_match'
     )
-    genre = django_filters.CharFilter(
-        field_name='genre__slug',
-        lookup_expr='icontains'
+    search = django_filters.CharFilter(method='filter_search')
+    ordering = TitleOrderingFilter(
+        fields=(
+            ('rating', 'rating'),
+            ('year', 'year'),
+            ('name', 'name'),
+            ('score_count', 'reviews_count'),
+        )
     )
 
     class Meta:
         model = Title
-        fields = ['category', 'genre', 'name', 'year']
+        fields = ['category', 'genre', 'genre_match', 'name', 'year',
+                  'year_min', 'year_max', 'decade', 'search', 'ordering']
+
+    def filter_category(self, queryset, name, value):
+        return queryset.filter(category_id__in=slug_ids(Category, value))
+
+    def filter_genre(self, queryset, name, value):
+        """Жанры проверяются полусоединением `id IN (SELECT ...)`.
+
+        Произведения не дублируются, выборку ведёт индекс (genre, title)
+        связной таблицы. Коррелированный EXISTS, с которого фильтр
+        начинался, SQLite выполнял обходом всех произведений с проверкой
+        связей для каждого.
+
+        По умолчанию достаточно любого из жанров, при `genre_match=all`
+        произведение должно относиться ко всем перечисленным.
+        """
+        slugs = set(value)
+        genre_ids = slug_ids(Genre, slugs)
+        if self.form.cleaned_data.get('genre_match') != MATCH_ALL:
+            return queryset.filter(pk__in=genre_title_ids(genre_ids))
+        if len(genre_ids) < len(slugs):
+            return queryset.none()
+        for genre_id in genre_ids:
+            queryset = queryset.filter(pk__in=genre_title_ids([genre_id]))
+        return queryset
+
+    def filter_genre_match(self, queryset, name, value):
+        return queryset
+
+    def filter_decade(self, queryset, name, value):
+        """`decade=1990` — произведения с 1990 по 1999 год."""
+        start = int(value) - int(value) % DECADE
+        return queryset.filter(year__range=(start, start + DECADE - 1))
+
+    def filter_search(self, queryset, name, value):
+        return search_titles(queryset, value)
@@ -0,0 +1,261 @@
+import io
+import json
+import math
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.authentication import tokens_for_user
+from api_yamdb.constants import ADMIN
+from reviews.models import Category, Comment, Genre, Review, Title
+from users.models import QueuedEmail
+
+User = get_user_model()
+
+BENCHMARK_PREFIX = 'benchmark'
+PERCENTILES = (50, 95, 99)
+DEFAULT_THRESHOLD = 1.25
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(len(ordered) * percent / 100))
+    return ordered[rank - 1]
+
+
+class Scenario:
+    """Один запрос к эндпоинту, повторяемый при замерах."""
+
+    def __init__(self, name, method, path, client, data=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.client = client
+        self.data = data
+
+    def request(self, iteration):
+        data = self.data(iteration) if callable(self.data) else self.data
+        return getattr(self.client, self.method)(self.path, data=data)
+
+
+class Command(BaseCommand):
+    """Команда менеджера для замера производительности эндпоинтов API."""
+
+    help = 'Benchmark API endpoints: latency percentiles, queries, bytes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--generate', action='store_true',
+            help=('Создать временную тестовую базу и загрузить в неё '
+                  'сгенерированный набор данных.')
+        )
+        parser.add_argument('--titles', type=int, default=2000)
+        parser.add_argument('--reviews', type=int, default=20000)
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument(
+            '--output', help='Сохранить результаты в JSON как базовую линию.'
+        )
+        parser.add_argument(
+            '--compare', help='Сравнить результаты с базовой линией из JSON.'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=DEFAULT_THRESHOLD,
+            help='Допустимый рост p95 относительно базовой линии.'
+        )
+
+    def handle(self, *args, **options):
+        old_name = None
+        if options['generate']:
+            old_name = connection.creation.create_test_db(
+                verbosity=0, autoclobber=True, serialize=False
+            )
+            self.load_dataset(options)
+        try:
+            results = self.run_benchmarks(options['iterations'])
+        finally:
+            if old_name is None:
+                User.objects.filter(
+                    username__startswith=BENCHMARK_PREFIX
+                ).delete()
+                QueuedEmail.objects.filter(
+                    to__startswith=BENCHMARK_PREFIX
+                ).delete()
+            else:
+                connection.creation.destroy_test_db(old_name, verbosity=0)
+        self.print_results(results)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2, ensure_ascii=False)
+        if options['compare']:
+            self.compare(results, options['compare'], options['threshold'])
+
+    def load_dataset(self, options):
+        with tempfile.TemporaryDirectory() as data_dir:
+            call_command(
+                'generate_csv_data', output_dir=data_dir,
+                titles=options['titles'], reviews=options['reviews'],
+                users=options['users'], comments=options['reviews'],
+                stdout=self.stdout
+            )
+            call_command(
+                'import_from_CSV', data_dir=data_dir, stdout=io.StringIO()
+            )
+
+    def build_scenarios(self):
+        admin, _ = User.objects.get_or_create(
+            username=f'{BENCHMARK_PREFIX}_admin',
+            defaults={'email': f'{BENCHMARK_PREFIX}_admin@yamdb.fake',
+                      'role': ADMIN}
+        )
+        token_user, _ = User.objects.get_or_create(
+            username=f'{BENCHMARK_PREFIX}_token',
+            defaults={'email': f'{BENCHMARK_PREFIX}_token@yamdb.fake',
+                      'confirmation_code': '123456'}
+        )
+        anonymous = APIClient()
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=(
+                f'Bearer {tokens_for_user(admin).access_token}'
+            )
+        )
+        title = Title.objects.order_by('-score_count').first()
+        review = Review.objects.filter(title=title).first()
+        commented = Comment.objects.values_list(
+            'review__title_id', 'review_id'
+        ).first()
+        category = Category.objects.first()
+        genres = list(Genre.objects.order_by('pk')[:2])
+        if not all((title, review, commented, category, genres)):
+            raise CommandError(
+                'Недостаточно данных для замеров, используйте --generate.'
+            )
+        titles_url = '/api/v1/titles/'
+        reviews_url = f'{titles_url}{title.pk}/reviews/'
+        comments_url = (
+            f'{titles_url}{commented[0]}/reviews/{commented[1]}/comments/'
+        )
+        genre_slugs = ','.join(genre.slug for genre in genres)
+        return [
+            Scenario('categories-list', 'get', '/api/v1/categories/',
+                     anonymous),
+            Scenario('genres-list', 'get', '/api/v1/genres/', anonymous),
+            Scenario('titles-list', 'get', titles_url, anonymous),
+            Scenario('titles-list?year', 'get',
+                     f'{titles_url}?year={title.year}', anonymous),
+            Scenario('titles-list?year_min', 'get',
+                     f'{titles_url}?year_min={title.year}', anonymous),
+            Scenario('titles-list?year_max', 'get',
+                     f'{titles_url}?year_max={title.year}', anonymous),
+            Scenario('titles-list?name', 'get',
+                     f'{titles_url}?name={title.name.split()[0]}',
+                     anonymous),
+            Scenario('titles-list?category', 'get',
+                     f'{titles_url}?category={category.slug}', anonymous),
+            Scenario('titles-list?cat&decade', 'get',
+                     f'{titles_url}?category={category.slug}'
+                     f'&decade={title.year}', anonymous),
+            Scenario('titles-list?genre', 'get',
+                     f'{titles_url}?genre={genres[0].slug}', anonymous),
+            Scenario('titles-list?genre_match', 'get',
+                     f'{titles_url}?genre={genre_slugs}&genre_match=all',
+                     anonymous),
+            Scenario('titles-list?search', 'get',
+                     f'{titles_url}?search={title.name.split()[0]}',
+                     anonymous),
+            Scenario('titles-list?ordering', 'get',
+                     f'{titles_url}?ordering=-rating', anonymous),
+            Scenario('titles-list?cursor', 'get',
+                     f'{titles_url}?pagination=cursor', anonymous),
+            Scenario('titles-detail', 'get', f'{titles_url}{title.pk}/',
+                     anonymous),
+            Scenario('reviews-list', 'get', reviews_url, anonymous),
+            Scenario('reviews-detail', 'get', f'{reviews_url}{review.pk}/',
+                     anonymous),
+            Scenario('comments-list', 'get', comments_url, anonymous),
+            Scenario('users-list', 'get', '/api/v1/users/', client),
+            Scenario('users-detail', 'get',
+                     f'/api/v1/users/{token_user.username}/', client),
+            Scenario('users-me', 'get', '/api/v1/users/me/', client),
+            Scenario('metrics', 'get', '/api/v1/metrics', client),
+            Scenario('signup', 'post', '/api/v1/auth/signup/', anonymous,
+                     lambda i: {
+                         'username': f'{BENCHMARK_PREFIX}_signup{i}',
+                         'email': f'{BENCHMARK_PREFIX}_signup{i}@yamdb.fake'
+                     }),
+            Scenario('signup-repeat', 'post', '/api/v1/auth/signup/',
+                     anonymous,
+                     {'username': f'{BENCHMARK_PREFIX}_repeat',
+                      'email': f'{BENCHMARK_PREFIX}_repeat@yamdb.fake'}),
+            Scenario('token', 'post', '/api/v1/auth/token/', anonymous,
+                     {'username': token_user.username,
+                      'confirmation_code': '123456'}),
+        ]
+
+    def run_benchmarks(self, iterations):
+        results = {}
+        for scenario in self.build_scenarios():
+            # Первый запрос каждого сценария идёт мимо кэша ответов,
+            # поэтому число запросов отражает полную стоимость эндпоинта.
+            cache.clear()
+            timings, queries = [], []
+            for iteration in range(iterations):
+                with CaptureQueriesContext(connection) as context:
+                    started = time.perf_counter()
+                    response = scenario.request(iteration)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries.append(len(context))
+                if response.status_code >= 400:
+                    raise CommandError(
+                        f'{scenario.name}: {scenario.method.upper()} '
+                        f'{scenario.path} вернул {response.status_code}'
+                    )
+            results[scenario.name] = {
+                **{f'p{p}_ms': round(percentile(timings, p), 3)
+                   for p in PERCENTILES},
+                'queries': max(queries),
+                'bytes': len(response.content),
+            }
+        return results
+
+    def print_results(self, results):
+        self.stdout.write(
+            f'{"scenario":<24}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}'
+            f'{"queries":>9}{"bytes":>9}'
+        )
+        for name, row in results.items():
+            self.stdout.write(
+                f'{name:<24}{row["p50_ms"]:>9.2f}{row["p95_ms"]:>9.2f}'
+                f'{row["p99_ms"]:>9.2f}{row["queries"]:>9}{row["bytes"]:>9}'
+            )
+
+    def compare(self, results, baseline_path, threshold):
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = []
+        for name, row in results.items():
+            base = baseline.get(name)
+            if base is None:
+                continue
+            if row['queries'] > base['queries']:
+                regressions.append(
+                    f'{name}: запросов {base["queries"]} -> {row["queries"]}'
+                )
+            if row['p95_ms'] > base['p95_ms'] * threshold:
+                regressions.append(
+                    f'{name}: p95 {base["p95_ms"]} -> {row["p95_ms"]} мс'
+                )
+        if regressions:
+            raise CommandError(
+                'Обнаружены регрессии:\n' + '\n'.join(regressions)
+            )
+        self.stdout.write(self.style.SUCCESS('Регрессий не обнаружено.'))
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.read_model import check_consistency, rebuild, refresh_titles
+
+
+class Command(BaseCommand):
+    """Команда менеджера для пересборки представления произведений."""
+
+    help = 'Rebuild or check the materialized title read model'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только проверить согласованность с основными таблицами.'
+        )
+        parser.add_argument(
+            '--fix', action='store_true',
+            help='Вместе с --check пересобрать расходящиеся строки.'
+        )
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            total = rebuild()
+            self.stdout.write(
+                self.style.SUCCESS(f'Собрано строк представления: {total}')
+            )
+            return
+        problems = check_consistency()
+        broken = [pk for ids in problems.values() for pk in ids]
+        for kind, ids in problems.items():
+            self.stdout.write(f'{kind}: {len(ids)} {ids[:20]}')
+        if not broken:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет.'))
+            return
+        if options['fix']:
+            refresh_titles(broken)
+            self.stdout.write(
+                self.style.SUCCESS(f'Пересобрано строк: {len(broken)}')
+            )
+            return
+        raise CommandError(f'Найдено расхождений: {len(broken)}')
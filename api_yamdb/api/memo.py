@@ -0,0 +1,60 @@
+"""Запоминание родительских объектов в пределах одного запроса.
+
+Вьюсеты, сериализаторы и права доступа получают произведение, отзыв или
+пользователя через `memoized`, поэтому каждый объект читается из базы не
+больше одного раза за запрос. Память живёт на `HttpRequest` и исчезает
+вместе с ним. При `REQUEST_MEMO_HEADER` число повторных обращений
+отдаётся в заголовке `X-Memo-Hits`.
+"""
+from django.conf import settings
+
+MEMO_ATTR = '_parent_memo'
+HITS_HEADER = 'X-Memo-Hits'
+
+
+class RequestMemo:
+    __slots__ = ('values', 'hits')
+
+    def __init__(self):
+        self.values = {}
+        self.hits = 0
+
+    def get(self, key, loader):
+        if key in self.values:
+            self.hits += 1
+            return self.values[key]
+        value = loader()
+        self.values[key] = value
+        return value
+
+
+def request_memo(request):
+    """Память запроса; DRF `Request` и его `HttpRequest` делят её."""
+    request = getattr(request, '_request', request)
+    memo = getattr(request, MEMO_ATTR, None)
+    if memo is None:
+        memo = RequestMemo()
+        setattr(request, MEMO_ATTR, memo)
+    return memo
+
+
+def memoized(request, key, loader):
+    """Значение по ключу из памяти запроса или результат `loader()`.
+
+    Исключения загрузчика (например, Http404) не запоминаются.
+    """
+    return request_memo(request).get(key, loader)
+
+
+class RequestMemoMiddleware:
+    """Добавляет к ответу заголовок с числом попаданий в память запроса."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        memo = getattr(request, MEMO_ATTR, None)
+        if memo is not None and settings.REQUEST_MEMO_HEADER:
+            response[HITS_HEADER] = str(memo.hits)
+        return response
@@ -0,0 +1,214 @@
+"""Метрики запросов в текстовом формате Prometheus.
+
+Счётчики живут в памяти процесса: при нескольких воркерах каждый отдаёт
+свои значения, суммирование выполняет Prometheus. Обновление не берёт
+блокировок, а строки меток создаются один раз на маршрут, поэтому
+middleware можно держать включённым в продакшене.
+"""
+import time
+from bisect import bisect_left
+
+from django.db import connection
+from django.http import HttpResponse
+from rest_framework.views import APIView
+
+from api.permissions import IsAdmin
+from users.cache import user_cache
+from users.mail import queue_depth
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+UNMATCHED_ROUTE = 'unmatched'
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+class Histogram:
+    __slots__ = ('bounds', 'counts', 'sum')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def render(self, name, labels):
+        lines = []
+        total = 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {total}')
+        total += self.counts[-1]
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {total}')
+        lines.append(f'{name}_sum{{{labels}}} {self.sum}')
+        lines.append(f'{name}_count{{{labels}}} {total}')
+        return lines
+
+
+class RouteStats:
+    """Все метрики одного маршрута (имени URL)."""
+
+    __slots__ = ('labels', 'statuses', 'latency', 'queries', 'sql_seconds')
+
+    def __init__(self, route):
+        self.labels = f'route="{route}"'
+        self.statuses = {}
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.sql_seconds = 0.0
+
+    def observe(self, status, seconds, queries, sql_seconds):
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        self.latency.observe(seconds)
+        self.queries.observe(queries)
+        self.sql_seconds += sql_seconds
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self.routes = {}
+
+    def route(self, name):
+        stats = self.routes.get(name)
+        if stats is None:
+            stats = self.routes.setdefault(name, RouteStats(name))
+        return stats
+
+    def reset(self):
+        self.routes = {}
+
+    def render(self):
+        routes = sorted(self.routes.items())
+        lines = [
+            '# HELP yamdb_http_requests_total HTTP requests by route '
+            'and status.',
+            '# TYPE yamdb_http_requests_total counter',
+        ]
+        for _, stats in routes:
+            for status, count in sorted(stats.statuses.items()):
+                lines.append(
+                    f'yamdb_http_requests_total{{{stats.labels},'
+                    f'status="{status}"}} {count}'
+                )
+        lines += [
+            '# HELP yamdb_http_request_duration_seconds Request latency.',
+            '# TYPE yamdb_http_request_duration_seconds histogram',
+        ]
+        for _, stats in routes:
+            lines += stats.latency.render(
+                'yamdb_http_request_duration_seconds', stats.labels
+            )
+        lines += [
+            '# HELP yamdb_sql_queries_per_request SQL queries per request.',
+            '# TYPE yamdb_sql_queries_per_request histogram',
+        ]
+        for _, stats in routes:
+            lines += stats.queries.render(
+                'yamdb_sql_queries_per_request', stats.labels
+            )
+        lines += [
+            '# HELP yamdb_sql_duration_seconds_total Time spent in SQL.',
+            '# TYPE yamdb_sql_duration_seconds_total counter',
+        ]
+        for _, stats in routes:
+            lines.append(
+                f'yamdb_sql_duration_seconds_total{{{stats.labels}}} '
+                f'{stats.sql_seconds}'
+            )
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def render_user_cache():
+    """Счётчики LRU-кэша пользователей для подбора его размера и TTL."""
+    stats = user_cache.stats()
+    lines = []
+    for name in ('hits', 'misses', 'evictions'):
+        lines += [
+            f'# HELP yamdb_user_cache_{name}_total User cache {name}.',
+            f'# TYPE yamdb_user_cache_{name}_total counter',
+            f'yamdb_user_cache_{name}_total {stats[name]}',
+        ]
+    lines += [
+        '# HELP yamdb_user_cache_size Users held in the cache.',
+        '# TYPE yamdb_user_cache_size gauge',
+        f'yamdb_user_cache_size {stats["size"]}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+def render_email_queue():
+    """Глубина очереди писем; считается запросом при каждом сборе."""
+    depth, age = queue_depth()
+    lines = [
+        '# HELP yamdb_email_queue_depth Queued emails by status.',
+        '# TYPE yamdb_email_queue_depth gauge',
+    ]
+    for status, total in sorted(depth.items()):
+        lines.append(f'yamdb_email_queue_depth{{status="{status}"}} {total}')
+    lines += [
+        '# HELP yamdb_email_queue_oldest_seconds Age of the oldest '
+        'pending email.',
+        '# TYPE yamdb_email_queue_oldest_seconds gauge',
+        f'yamdb_email_queue_oldest_seconds {age}',
+    ]
+    return '\n'.join(lines) + '\n'
+
+
+class SQLTimer:
+    """Обёртка выполнения SQL: число запросов и суммарное время."""
+
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """Собирает метрики каждого запроса по имени маршрута."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = SQLTimer()
+        started = time.perf_counter()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+        match = request.resolver_match
+        route = match.url_name if match and match.url_name else (
+            UNMATCHED_ROUTE
+        )
+        registry.route(route).observe(
+            response.status_code, elapsed, timer.count, timer.seconds
+        )
+        return response
+
+
+class MetricsView(APIView):
+    """Метрики процесса в формате Prometheus, доступны администраторам."""
+
+    permission_classes = (IsAdmin,)
+
+    def get(self, request):
+        return HttpResponse(
+            registry.render() + render_user_cache() + render_email_queue(),
+            content_type=CONTENT_TYPE
+        )
@@ -0,0 +1,73 @@
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import (BasePagination, CursorPagination,
+                                       PageNumberPagination)
+
+PAGE_MODE = 'page'
+CURSOR_MODE = 'cursor'
+
+
+class KeysetPagination(CursorPagination):
+    """Курсорная пагинация по ключу сортировки вьюсета.
+
+    Не считает COUNT(*) и не использует OFFSET: следующая страница
+    выбирается условием по полям `cursor_ordering` вьюсета. Другая
+    сортировка выборки (`?ordering=`, релевантность поиска) молча
+    терялась бы, поэтому такой запрос отклоняется с ошибкой 400.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(view.cursor_ordering)
+        applied = tuple(queryset.query.order_by)
+        if applied and applied != ordering:
+            raise ValidationError({
+                PageOrCursorPagination.mode_query_param: (
+                    'Курсорная пагинация возможна только с сортировкой '
+                    'по умолчанию, без ordering и search.'
+                )
+            })
+        return ordering
+
+
+class PageOrCursorPagination(BasePagination):
+    """Постраничная или курсорная пагинация на выбор.
+
+    Курсорный режим включается параметром `?pagination=cursor`, наличием
+    параметра `cursor` или атрибутом вьюсета `pagination_mode = 'cursor'`.
+    Вьюсеты без атрибута `cursor_ordering` всегда пагинируются по страницам.
+    """
+
+    mode_query_param = 'pagination'
+    paginator = None
+
+    def get_mode(self, request, view):
+        if getattr(view, 'cursor_ordering', None) is None:
+            return PAGE_MODE
+        if KeysetPagination.cursor_query_param in request.query_params:
+            return CURSOR_MODE
+        mode = request.query_params.get(self.mode_query_param)
+        if mode in (PAGE_MODE, CURSOR_MODE):
+            return mode
+        return getattr(view, 'pagination_mode', PAGE_MODE)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.get_mode(request, view) == CURSOR_MODE:
+            self.paginator = KeysetPagination()
+        else:
+            self.paginator = PageNumberPagination()
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    def get_results(self, data):
+        return data['results']
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, 'display_page_controls', False)
+
+    def to_html(self):
+        return self.paginator.to_html()
+
+    def get_schema_operation_parameters(self, view):
+        return PageNumberPagination().get_schema_operation_parameters(view)
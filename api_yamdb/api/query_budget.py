@@ -0,0 +1,55 @@
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Запрос к эндпоинту выполнил больше SQL-запросов, чем разрешено."""
+
+
+class QueryCounter:
+    """Обёртка выполнения SQL, считающая запросы к базе."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class QueryBudgetMixin:
+    """Ограничение числа SQL-запросов на один HTTP-запрос к вьюсету.
+
+    Бюджет задаётся словарём `query_budget` вида {action: max_queries}.
+    При превышении пишется предупреждение в лог, а при настройке
+    `QUERY_BUDGET_RAISE = True` (используется в тестах) выбрасывается
+    исключение `QueryBudgetExceeded`.
+    """
+
+    query_budget = {}
+
+    def get_query_budget(self):
+        return self.query_budget.get(getattr(self, 'action', None))
+
+    def dispatch(self, request, *args, **kwargs):
+        counter = QueryCounter()
+        with connection.execute_wrapper(counter):
+            response = super().dispatch(request, *args, **kwargs)
+        self.check_query_budget(counter.count)
+        return response
+
+    def check_query_budget(self, query_count):
+        budget = self.get_query_budget()
+        if budget is None or query_count <= budget:
+            return
+        message = (
+            f'{type(self).__name__}.{self.action}: {query_count} SQL '
+            f'queries, budget is {budget} ({self.request.path})'
+        )
+        if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
@@ -0,0 +1,150 @@
+"""Материализованное представление произведений для чтения.
+
+Для каждого произведения хранится готовый JSON в формате
+`TitleViewSerializer`, страницы списка собираются склейкой этих
+фрагментов без сериализации. Хуки ниже обновляют строки после коммита
+любой записи, которая меняет ответ: произведения, его жанров, категории,
+жанра или отзывов (рейтинг). Версия `Title` сдвигается уже после записи
+строк: иначе ответ, прочитанный между сдвигом версий из
+`reviews.signals` и обновлением строк, попал бы в кэш и в ETag со
+старым JSON под новой версией.
+"""
+import json
+
+from django.db import transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import receiver
+from rest_framework.renderers import JSONRenderer
+
+from api.serializers import TitleViewSerializer
+from reviews.models import (Category, Genre, GenreTitle, Review, Title,
+                            TitleReadModel)
+from reviews.signals import related_title_ids
+from reviews.versions import bump_versions
+
+BATCH_SIZE = 500
+renderer = JSONRenderer()
+
+
+def titles_for_render():
+    """Категории и жанры берутся из снимков, подгружаются только связи."""
+    return Title.objects.prefetch_related('genretitle_set')
+
+
+def build_row(title):
+    return TitleReadModel(title_id=title.pk, json=render_fragment(title))
+
+
+def render_fragment(title):
+    return renderer.render(TitleViewSerializer(title).data).decode()
+
+
+def refresh_titles(title_ids):
+    """Пересобираем строки указанных произведений и сдвигаем версию."""
+    title_ids = list(set(title_ids))
+    for start in range(0, len(title_ids), BATCH_SIZE):
+        batch = title_ids[start:start + BATCH_SIZE]
+        rows = [
+            build_row(title)
+            for title in titles_for_render().filter(pk__in=batch)
+        ]
+        with transaction.atomic():
+            TitleReadModel.objects.filter(title_id__in=batch).delete()
+            TitleReadModel.objects.bulk_create(rows)
+    if title_ids:
+        bump_versions(Title)
+
+
+def refresh_on_commit(title_ids):
+    title_ids = list(title_ids)
+    transaction.on_commit(lambda: refresh_titles(title_ids))
+
+
+def rebuild():
+    """Пересобираем представление целиком, возвращаем число строк."""
+    TitleReadModel.objects.all().delete()
+    title_ids = Title.objects.order_by('pk').values_list('pk', flat=True)
+    total = 0
+    batch = []
+    for title_id in title_ids.iterator(chunk_size=BATCH_SIZE):
+        batch.append(title_id)
+        if len(batch) == BATCH_SIZE:
+            refresh_titles(batch)
+            total += len(batch)
+            batch = []
+    refresh_titles(batch)
+    return total + len(batch)
+
+
+def check_consistency():
+    """Сравниваем хранимые строки со свежей сборкой.
+
+    Возвращает словарь с id произведений без строки (`missing`), строк
+    без произведения (`orphaned`) и строк с устаревшими данными (`stale`).
+    """
+    problems = {'missing': [], 'orphaned': [], 'stale': []}
+    stored = TitleReadModel.objects.in_bulk()
+    titles = titles_for_render().order_by('pk')
+    for title in titles.iterator(chunk_size=BATCH_SIZE):
+        row = stored.pop(title.pk, None)
+        if row is None:
+            problems['missing'].append(title.pk)
+            continue
+        if json.loads(row.json) != json.loads(render_fragment(title)):
+            problems['stale'].append(title.pk)
+    problems['orphaned'] = sorted(stored)
+    return problems
+
+
+def render_page(envelope, fragments):
+    """Склеиваем ответ из конверта пагинации и готовых фрагментов."""
+    head = renderer.render(envelope).decode()[:-1]
+    separator = ',' if envelope else ''
+    return f'{head}{separator}"results":[{",".join(fragments)}]}}'
+
+
+@receiver(post_save, sender=Title)
+def refresh_title(sender, instance, **kwargs):
+    refresh_on_commit([instance.pk])
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def refresh_parent_title(sender, instance, **kwargs):
+    if instance.title_id is not None:
+        refresh_on_commit([instance.title_id])
+
+
+@receiver(m2m_changed, sender=GenreTitle)
+def refresh_on_genres_change(sender, instance, action, reverse, pk_set,
+                             **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear', 'post_clear'):
+        return
+    if not reverse:
+        refresh_on_commit([instance.pk])
+    elif pk_set:
+        refresh_on_commit(pk_set)
+    elif action == 'pre_clear':
+        refresh_on_commit(related_title_ids(instance))
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def remember_rendered_titles(sender, instance, **kwargs):
+    instance._rendered_title_ids = list(related_title_ids(instance))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def refresh_on_reference_change(sender, instance, created=False, **kwargs):
+    if created:
+        return
+    title_ids = getattr(instance, '_rendered_title_ids', None)
+    if title_ids is None:
+        title_ids = list(related_title_ids(instance))
+    refresh_on_commit(title_ids)
@@ -0,0 +1,92 @@
+"""Снимки справочников категорий и жанров в памяти процесса.
+
+Таблицы маленькие и меняются редко, поэтому каждый процесс держит их
+целиком: объекты по id и по slug и готовые представления сериализатора.
+Снимок не меняется после сборки — при изменении строится новый. Свой
+процесс сбрасывает снимок сигналами сразу, другие воркеры замечают
+изменение по общей версии модели (`reviews.versions`), которая
+проверяется не чаще `REFERENCE_SNAPSHOT_CHECK_INTERVAL`. Промах по id
+или slug проверяет версию немедленно, чтобы только что созданный объект
+не считался несуществующим.
+
+Объекты снимка общие для всех запросов процесса, изменять их нельзя.
+"""
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from reviews.versions import current_versions
+
+Snapshot = namedtuple('Snapshot', ('version', 'by_id', 'by_slug', 'data'))
+
+
+class ReferenceSnapshot:
+
+    def __init__(self, model, serializer_class):
+        self.model = model
+        self.serializer_class = serializer_class
+        self.snapshot = None
+        self.checked_at = 0.0
+        post_save.connect(self.invalidate, sender=model, weak=False)
+        post_delete.connect(self.invalidate, sender=model, weak=False)
+
+    def __deepcopy__(self, memo):
+        # Поля DRF копируют аргументы конструктора, снимок процесса один.
+        return self
+
+    def get(self, force_check=False):
+        snapshot = self.snapshot
+        now = time.monotonic()
+        if (
+            snapshot is not None
+            and not force_check
+            and now - self.checked_at
+            < settings.REFERENCE_SNAPSHOT_CHECK_INTERVAL
+        ):
+            return snapshot
+        version = current_versions([self.model])[0]
+        if snapshot is None or snapshot.version != version:
+            snapshot = self.load(version)
+            self.snapshot = snapshot
+        self.checked_at = now
+        return snapshot
+
+    def load(self, version):
+        objects = list(self.model.objects.order_by('pk'))
+        data = self.serializer_class(objects, many=True).data
+        return Snapshot(
+            version,
+            MappingProxyType({obj.pk: obj for obj in objects}),
+            MappingProxyType({obj.slug: obj for obj in objects}),
+            MappingProxyType({
+                obj.pk: dict(item) for obj, item in zip(objects, data)
+            }),
+        )
+
+    def invalidate(self, **kwargs):
+        # Снимок, собранный до коммита другим потоком, тоже устарел.
+        self.snapshot = None
+        transaction.on_commit(self.reset)
+
+    def reset(self):
+        self.snapshot = None
+
+    def lookup(self, index, key):
+        """Ищем в снимке; при промахе версия сверяется немедленно."""
+        found = getattr(self.get(), index).get(key)
+        if found is None:
+            found = getattr(self.get(force_check=True), index).get(key)
+        return found
+
+    def by_id(self, pk):
+        return self.lookup('by_id', pk)
+
+    def by_slug(self, slug):
+        return self.lookup('by_slug', slug)
+
+    def data(self, pk):
+        return self.lookup('data', pk)
@@ -2,11 +2,17 @@ import datetime
 
 from django.contrib.auth import get_user_model
 from django.core.validators import RegexValidator
+from django.db import IntegrityError
+from django.utils.encoding import smart_str
 from rest_framework import serializers
 from rest_framework.exceptions import NotFound
 from rest_framework.relations import SlugRelatedField
+from rest_framework.settings import api_settings
 
+from api.memo import memoized
+from api.reference import ReferenceSnapshot
 from reviews.models import Category, Genre, Title, Review, Comment
+from users.cache import user_cache
 
 User = get_user_model()
 
@@ -30,13 +36,52 @@ class GenreSerializer(serializers.ModelSerializer):
         model = Genre
 
 
+category_snapshot = ReferenceSnapshot(Category, CategorySerializer)
+genre_snapshot = ReferenceSnapshot(Genre, GenreSerializer)
+
+
+class SnapshotSlugRelatedField(SlugRelatedField):
+    """Slug категории или жанра, который разрешается по снимку без запроса."""
+
+    def __init__(self, snapshot, **kwargs):
+        self.snapshot = snapshot
+        super().__init__(slug_field='slug', **kwargs)
+
+    def use_pk_only_optimization(self):
+        return True
+
+    def to_internal_value(self, data):
+        if not isinstance(data, (str, int)):
+            self.fail('invalid')
+        obj = self.snapshot.by_slug(str(data))
+        if obj is None:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
+        return obj
+
+    def to_representation(self, obj):
+        return self.snapshot.by_id(obj.pk).slug
+
+
+class SnapshotField(serializers.Field):
+    """Готовое представление объекта справочника из снимка по id."""
+
+    def __init__(self, snapshot, **kwargs):
+        self.snapshot = snapshot
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, pk):
+        return self.snapshot.data(pk)
+
+
 class TitleSerializer(serializers.ModelSerializer):
     """Сериализатор модели произведений."""
 
-    category = SlugRelatedField(slug_field='slug',
-                                queryset=Category.objects.all())
-    genre = SlugRelatedField(slug_field='slug',
-                             queryset=Genre.objects.all(), many=True)
+    category = SnapshotSlugRelatedField(category_snapshot,
+                                        queryset=Category.objects.all())
+    genre = SnapshotSlugRelatedField(genre_snapshot,
+                                     queryset=Genre.objects.all(), many=True)
 
     def validate_year(self, value):
         if value > datetime.date.today().year:
@@ -45,6 +90,19 @@ class TitleSerializer(serializers.ModelSerializer):
             )
         return value
 
+    def create(self, validated_data):
+        genres = validated_data.pop('genre', [])
+        title = super().create(validated_data)
+        title.set_genres(genres)
+        return title
+
+    def update(self, instance, validated_data):
+        genres = validated_data.pop('genre', None)
+        title = super().update(instance, validated_data)
+        if genres is not None:
+            title.set_genres(genres)
+        return title
+
     class Meta:
         fields = (
             'id',
@@ -55,13 +113,21 @@ class TitleSerializer(serializers.ModelSerializer):
             'category',
             'rating'
         )
+        read_only_fields = ('rating',)
         model = Title
 
 
 class TitleViewSerializer(serializers.ModelSerializer):
-    category = CategorySerializer(read_only=True)
-    genre = GenreSerializer(read_only=True, many=True)
-    rating = serializers.FloatField(source='average_rating', read_only=True)
+    """Представление произведения; жанры ждут `genretitle_set` в prefetch."""
+
+    category = SnapshotField(category_snapshot, source='category_id')
+    genre = serializers.SerializerMethodField()
+
+    def get_genre(self, title):
+        genre_ids = sorted(
+            link.genre_id for link in title.genretitle_set.all()
+        )
+        return [genre_snapshot.data(pk) for pk in genre_ids]
 
     class Meta:
         fields = (
@@ -120,16 +186,24 @@ class TokenSerializer(serializers.Serializer):
     confirmation_code = serializers.CharField(required=True, max_length=6)
 
     def validate(self, data):
-        try:
-            user = User.objects.get(username=data['username'])
-        except User.DoesNotExist:
-            raise NotFound('Пользователь не найден.')
+        username = data['username']
+        user = memoized(
+            self.context['request'], (User, username),
+            lambda: self.get_user(username)
+        )
 
         if user.confirmation_code != data['confirmation_code']:
             raise serializers.ValidationError('Неверный код подтверждения.')
 
         return data
 
+    def get_user(self, username):
+        # Код подтверждения меняется при регистрации: читаем из базы.
+        user = user_cache.by_username(username, force_check=True)
+        if user is None:
+            raise NotFound('Пользователь не найден.')
+        return user
+
 
 class UserSerializer(serializers.ModelSerializer):
     """Сериализатор для модели пользователя."""
@@ -174,18 +248,19 @@ class ReviewSerializer(serializers.ModelSerializer):
         max_value=SCORE_MAX_VALUE
     )
 
-    def validate(self, data):
-        """Запрещаем оставлять более одного отзыва на произведение."""
-        if (
-            self.context['request'].method == 'POST'
-            and self.context['request'].user.reviews.filter(
-                title_id=self.context['view'].kwargs['title_id']
-            ).exists()
-        ):
-            raise serializers.ValidationError(
-                'Вы уже оставили отзыв на это произведение.'
-            )
-        return data
+    def create(self, validated_data):
+        """Второй отзыв на произведение отсекает уникальный индекс.
+
+        Отдельная проверка `exists()` перед вставкой не нужна.
+        """
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы уже оставили отзыв на это произведение.'
+                ]
+            })
 
     class Meta:
         fields = ('id', 'text', 'author', 'score', 'pub_date')
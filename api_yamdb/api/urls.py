@@ -1,6 +1,7 @@
 from django.urls import include, path
 from rest_framework import routers
 
+from api.metrics import MetricsView
 from api.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
                        ReviewViewSet, SignupView, TitleViewSet, TokenView,
                        UserViewSet)
@@ -27,4 +28,5 @@ auth_patterns = [
 urlpatterns = [
     path('v1/', include(router.urls)),
     path('v1/auth/', include(auth_patterns)),
+    path('v1/metrics', MetricsView.as_view(), name='metrics'),
 ]
@@ -1,8 +1,7 @@
-from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics, mixins, status, viewsets
@@ -10,28 +9,74 @@ from rest_framework.decorators import action
 from rest_framework.permissions import (IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from api.authentication import full_user, tokens_for_user
+from api.cache import VersionedCacheMixin
+from api.conditional import ConditionalGetMixin
 from api.filters import TitleFilter
+from api.memo import memoized
 from api.permissions import IsAdminOrReadOnly, IsModeratorOrOwner, IsAdmin
+from api.query_budget import QueryBudgetMixin
+from api.read_model import render_fragment, render_page, titles_for_render
 from api.serializers import (CategorySerializer, CommentSerializer,
                              GenreSerializer, MeSerializer, ReviewSerializer,
                              SignupSerializer, TitleSerializer,
                              TitleViewSerializer, TokenSerializer,
-                             UserSerializer)
-from reviews.models import Category, Genre, Review, Title
+                             UserSerializer, category_snapshot,
+                             genre_snapshot)
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, TitleReadModel)
+from users.cache import user_cache
+from users.mail import enqueue_email
+from users.signup import claim_signup, forget_signup
 
 User = get_user_model()
 
 
-class CreateListDestroyViewSet(mixins.CreateModelMixin,
+def get_user_by_username(request, username, force_check=False):
+    """Пользователь по username, один раз за запрос.
+
+    Для чтения хватает `user_cache`. Перед изменением, удалением и
+    выдачей токена нужен `force_check`: строка читается из базы,
+    устаревшие данные недопустимы.
+    """
+    def load():
+        user = user_cache.by_username(username, force_check=force_check)
+        if user is None:
+            raise Http404
+        return user
+
+    return memoized(request, (User, username), load)
+
+
+class CreateListDestroyViewSet(QueryBudgetMixin,
+                               mixins.CreateModelMixin,
                                mixins.ListModelMixin,
                                mixins.DestroyModelMixin,
                                viewsets.GenericViewSet):
     pass
 
 
-class CategoryViewSet(CreateListDestroyViewSet):
+class SnapshotListMixin:
+    """Список справочника без поиска отдаётся из снимка процесса."""
+
+    snapshot = None
+
+    def list(self, request, *args, **kwargs):
+        if filters.SearchFilter.search_param in request.query_params:
+            return super().list(request, *args, **kwargs)
+        snapshot = self.snapshot.get()
+        objects = list(snapshot.by_id.values())
+        page = self.paginate_queryset(objects)
+        if page is None:
+            return Response([snapshot.data[obj.pk] for obj in objects])
+        return self.get_paginated_response(
+            [snapshot.data[obj.pk] for obj in page]
+        )
+
+
+class CategoryViewSet(SnapshotListMixin, VersionedCacheMixin,
+                      CreateListDestroyViewSet):
     """Вьюсет групп категорий."""
 
     queryset = Category.objects.all()
@@ -40,9 +85,13 @@ class CategoryViewSet(CreateListDestroyViewSet):
     search_fields = ('name',)
     permission_classes = (IsAdminOrReadOnly,)
     lookup_field = 'slug'
+    query_budget = {'list': 3}
+    cache_models = (Category,)
+    snapshot = category_snapshot
 
 
-class GenreViewSet(CreateListDestroyViewSet):
+class GenreViewSet(SnapshotListMixin, VersionedCacheMixin,
+                   CreateListDestroyViewSet):
     """Вьюсет групп жанров."""
 
     queryset = Genre.objects.all()
@@ -51,62 +100,150 @@ class GenreViewSet(CreateListDestroyViewSet):
     search_fields = ('name',)
     lookup_field = 'slug'
     permission_classes = (IsAdminOrReadOnly,)
+    query_budget = {'list': 3}
+    cache_models = (Genre,)
+    snapshot = genre_snapshot
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(QueryBudgetMixin, ConditionalGetMixin,
+                   VersionedCacheMixin, viewsets.ModelViewSet):
     """Вьюсет групп произведений."""
 
-    queryset = Title.objects.annotate(
-        average_rating=Avg('reviews__score')
-    ).order_by('id')
+    queryset = titles_for_render().order_by('id')
     serializer_class = TitleSerializer
     filter_backends = (DjangoFilterBackend,)
     permission_classes = (IsAdminOrReadOnly,)
-    http_method_names = ['get', 'post', 'patch', 'delete']
+    http_method_names = ['get', 'head', 'post', 'patch', 'delete']
     filterset_class = TitleFilter
+    cursor_ordering = ('id',)
+    query_budget = {'list': 4, 'retrieve': 3}
+    cache_models = (Title, Category, Genre, GenreTitle, Review)
+    etag_models = cache_models
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitleViewSerializer
         return TitleSerializer
 
+    def list(self, request, *args, **kwargs):
+        """Склеиваем страницу из готовых JSON-фрагментов произведений."""
+        if request.accepted_renderer.format != 'json':
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())
+        # Счётчик страниц идёт по одной таблице произведений, JSON страницы
+        # читается отдельным запросом по ключу.
+        rows = self.paginate_queryset(
+            queryset.prefetch_related(None).values('id')
+        )
+        envelope = self.paginator.get_paginated_response([]).data
+        del envelope['results']
+        return HttpResponse(
+            render_page(envelope, self.get_fragments(rows)),
+            content_type='application/json'
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            title_id = int(kwargs['pk'])
+        except (TypeError, ValueError):
+            raise Http404
+        fragment = TitleReadModel.objects.filter(
+            title_id=title_id
+        ).values_list('json', flat=True).first()
+        if request.accepted_renderer.format != 'json' or fragment is None:
+            return super().retrieve(request, *args, **kwargs)
+        return HttpResponse(fragment, content_type='application/json')
+
+    def get_fragments(self, rows):
+        ids = [row['id'] for row in rows]
+        stored = dict(
+            TitleReadModel.objects.filter(
+                title_id__in=ids
+            ).values_list('title_id', 'json')
+        )
+        rendered = {
+            pk: render_fragment(title)
+            for pk, title in titles_for_render().in_bulk(
+                [pk for pk in ids if pk not in stored]
+            ).items()
+        }
+        return [stored.get(pk) or rendered[pk] for pk in ids]
+
 
-class ReviewViewSet(viewsets.ModelViewSet):
+class ReviewViewSet(QueryBudgetMixin, ConditionalGetMixin,
+                    viewsets.ModelViewSet):
     """Вьюсет для отзывов."""
 
     serializer_class = ReviewSerializer
     permission_classes = (IsAuthenticatedOrReadOnly, IsModeratorOrOwner)
-    http_method_names = ['get', 'post', 'patch', 'delete']
+    http_method_names = ['get', 'head', 'post', 'patch', 'delete']
+    cursor_ordering = ('pub_date', 'id')
+    query_budget = {'list': 4, 'retrieve': 3}
+    # Имя автора выводится в отзыве.
+    etag_models = (User,)
 
     def get_title(self):
-        """Получаем объект Title по его ID."""
-        return get_object_or_404(Title, id=self.kwargs['title_id'])
+        """Получаем объект Title по его ID, один раз за запрос."""
+        title_id = self.kwargs['title_id']
+        return memoized(
+            self.request, (Title, title_id),
+            lambda: get_object_or_404(Title, id=title_id)
+        )
+
+    def get_validators(self):
+        """ETag отзывов зависит только от отзывов этого произведения.
+
+        Число отзывов и последняя дата из индекса (title, pub_date) видят
+        вставки и удаления и мимо сигналов, версия области — правки.
+        """
+        title = self.get_title()
+        latest = title.reviews.aggregate(latest=Max('pub_date'))['latest']
+        return self.scoped_validators(
+            Review, title.pk, title.score_count, title.score_sum, latest
+        )
 
     def get_queryset(self):
         title = self.get_title()
-        return title.reviews.all()
+        return title.reviews.select_related('author')
 
     def perform_create(self, serializer):
         title = self.get_title()
         serializer.save(author=self.request.user, title=title)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(QueryBudgetMixin, ConditionalGetMixin,
+                     viewsets.ModelViewSet):
     """Вьюсет для комментариев к отзывам."""
 
     serializer_class = CommentSerializer
     permission_classes = (IsAuthenticatedOrReadOnly, IsModeratorOrOwner)
-    http_method_names = ['get', 'post', 'patch', 'delete']
+    http_method_names = ['get', 'head', 'post', 'patch', 'delete']
+    cursor_ordering = ('pub_date', 'id')
+    query_budget = {'list': 4, 'retrieve': 3}
+    etag_models = (User,)
 
     def get_review(self):
-        """Получаем объект Review по его ID и title_id."""
+        """Получаем объект Review по его ID и title_id, один раз за запрос."""
         review_id = self.kwargs.get('review_id')
         title_id = self.kwargs.get('title_id')
-        return get_object_or_404(Review, id=review_id, title_id=title_id)
+        return memoized(
+            self.request, (Review, title_id, review_id),
+            lambda: get_object_or_404(Review, id=review_id, title_id=title_id)
+        )
+
+    def get_validators(self):
+        """ETag комментариев зависит только от комментариев этого отзыва."""
+        review = self.get_review()
+        stats = review.comments.aggregate(
+            count=Count('id'), latest=Max('pub_date')
+        )
+        return self.scoped_validators(
+            Comment, review.pk, stats['count'], stats['latest']
+        )
 
     def get_queryset(self):
         review = self.get_review()
-        return review.comments.all()
+        return review.comments.select_related('author')
 
     def perform_create(self, serializer):
         review = self.get_review()
@@ -123,15 +260,20 @@ class SignupView(generics.CreateAPIView):
         username = serializer.validated_data['username']
         email = serializer.validated_data['email']
 
-        user = User.objects.filter(username=username, email=email).first()
-
-        if not user:
-            user = User.objects.create(
-                username=username,
-                email=email,
-            )
-
-        self.send_confirmation_code(user, email)
+        if claim_signup(username, email):
+            try:
+                user = User.objects.filter(
+                    username=username, email=email
+                ).first()
+                if not user:
+                    user = User.objects.create(
+                        username=username,
+                        email=email,
+                    )
+                self.send_confirmation_code(user, email)
+            except Exception:
+                forget_signup(username, email)
+                raise
 
         return Response(
             {'email': email, 'username': username},
@@ -141,14 +283,12 @@ class SignupView(generics.CreateAPIView):
     def send_confirmation_code(self, user, email):
         confirmation_code = default_token_generator.make_token(user)
         user.confirmation_code = confirmation_code
-        user.save()
+        user.save(update_fields=['confirmation_code'])
 
-        send_mail(
+        enqueue_email(
             'Код подтверждения',
             f'Ваш код подтверждения: {confirmation_code}',
-            settings.DEFAULT_FROM_EMAIL,
-            [email],
-            fail_silently=False,
+            email,
         )
 
 
@@ -159,8 +299,10 @@ class TokenView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        user = User.objects.get(username=serializer.validated_data['username'])
-        refresh = RefreshToken.for_user(user)
+        user = get_user_by_username(
+            request, serializer.validated_data['username'], force_check=True
+        )
+        refresh = tokens_for_user(user)
 
         return Response({
             'access': str(refresh.access_token),
@@ -168,19 +310,20 @@ class TokenView(generics.CreateAPIView):
         }, status=status.HTTP_200_OK)
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(QueryBudgetMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAdmin]
     filter_backends = [filters.SearchFilter]
     search_fields = ['username']
+    cursor_ordering = ('id',)
+    query_budget = {'list': 3, 'retrieve': 2}
 
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
     def retrieve(self, request, *args, **kwargs):
-        username = kwargs.get('pk')
-        user = get_object_or_404(User, username=username)
+        user = get_user_by_username(request, kwargs.get('pk'))
         serializer = self.get_serializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -194,16 +337,18 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(status=status.HTTP_405_METHOD_NOT_ALLOWED)
 
     def partial_update(self, request, *args, **kwargs):
-        username = kwargs.get('pk')
-        user = get_object_or_404(User, username=username)
+        user = get_user_by_username(
+            request, kwargs.get('pk'), force_check=True
+        )
         serializer = self.get_serializer(user, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def destroy(self, request, *args, **kwargs):
-        username = kwargs.get('pk')
-        user = get_object_or_404(User, username=username)
+        user = get_user_by_username(
+            request, kwargs.get('pk'), force_check=True
+        )
         user.delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
@@ -214,8 +359,11 @@ class UserViewSet(viewsets.ModelViewSet):
         url_path='me'
     )
     def me(self, request):
+        user = full_user(
+            request.user, force_check=request.method == 'PATCH'
+        )
         if request.method == 'GET':
-            serializer = MeSerializer(request.user)
+            serializer = MeSerializer(user)
             return Response(serializer.data)
         if request.method == 'PATCH':
             if 'role' in request.data:
@@ -225,7 +373,7 @@ class UserViewSet(viewsets.ModelViewSet):
                 )
 
             serializer = MeSerializer(
-                request.user,
+                user,
                 data=request.data, partial=True
             )
             serializer.is_valid(raise_exception=True)
@@ -31,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.memo.RequestMemoMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -72,6 +74,44 @@ DATABASES = {
 }
 
 
+# Cache
+# В кэше лежат версии моделей и токенов, поколение кэша пользователей и
+# окна регистрации, общие для всех процессов сервера. LocMemCache годится
+# только для одного процесса; при WEB_CONCURRENCY > 1 нужен общий бэкенд
+# (Memcached, Redis, база данных), иначе сервер не запустится.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Число процессов сервера (так же его читает gunicorn).
+WEB_CONCURRENCY = int(os.getenv('WEB_CONCURRENCY', 1))
+
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Сколько секунд живёт версия модели в кэше; после этого кэш ответов и
+# ETag по этой модели перестают совпадать.
+MODEL_VERSION_TIMEOUT = 300
+
+# Как часто (в секундах) снимки категорий и жанров в памяти процесса
+# сверяются с общими версиями моделей.
+REFERENCE_SNAPSHOT_CHECK_INTERVAL = 1.0
+
+# Сколько секунд версия токенов пользователя живёт в кэше: предел
+# задержки отзыва для записей мимо модели.
+TOKEN_VERSION_CACHE_TIMEOUT = 10
+
+# LRU-кэш пользователей в памяти процесса: число строк, время жизни
+# строки и как часто сверяется общее поколение кэша (в секундах).
+USER_CACHE_SIZE = 1024
+USER_CACHE_TIMEOUT = 60
+USER_CACHE_CHECK_INTERVAL = 1.0
+
+
 # Password validation
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -113,12 +153,12 @@ STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.StatelessJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.PageOrCursorPagination',
     'PAGE_SIZE': 5,
 
     'DEFAULT_FILTER_BACKENDS': [
@@ -127,6 +167,14 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Заголовок X-Memo-Hits с числом повторных обращений к объектам,
+# запомненным в пределах запроса.
+REQUEST_MEMO_HEADER = DEBUG
+
+# Превышение бюджета SQL-запросов вьюсета: False - запись в лог,
+# True - исключение (включается в тестах).
+QUERY_BUDGET_RAISE = False
+
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'AUTH_HEADER_TYPES': ('Bearer',),
@@ -140,3 +188,19 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'tmp', 'app-messages')
 
 if not os.path.exists(EMAIL_FILE_PATH):
     os.makedirs(EMAIL_FILE_PATH)
+
+# Очередь писем (users.mail): письма отправляет send_queued_emails.
+# При EMAIL_QUEUE_EAGER письмо уходит сразу после коммита запроса.
+EMAIL_QUEUE_EAGER = False
+EMAIL_QUEUE_WORKERS = 4
+EMAIL_QUEUE_BATCH_SIZE = 100
+EMAIL_QUEUE_POLL_INTERVAL = 1.0
+# Сколько секунд забранное воркером письмо не выдаётся другим.
+EMAIL_QUEUE_LEASE = 300
+EMAIL_QUEUE_MAX_ATTEMPTS = 5
+# Задержка перед первой повторной попыткой, дальше она удваивается.
+EMAIL_QUEUE_RETRY_DELAY = 30
+
+# Окно (в секундах), в котором повторная регистрация той же пары
+# username/email не выдаёт новый код и не отправляет письмо.
+SIGNUP_COALESCE_WINDOW = 60
@@ -1,6 +1,14 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        from .search import create_search_table
+        from .versions import check_shared_cache
+        check_shared_cache()
+        post_migrate.connect(create_search_table, sender=self)
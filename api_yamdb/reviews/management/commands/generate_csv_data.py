@@ -0,0 +1,182 @@
+import csv
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api_yamdb.constants import ADMIN, AUTHENTICATED_USER, MODERATOR
+from reviews.models import MAX_SCORE, MIN_SCORE
+
+DEFAULT_OUTPUT_DIR = os.path.join(settings.BASE_DIR, 'tmp', 'generated_data')
+FIRST_YEAR = 1900
+LAST_YEAR = 2024
+FIRST_PUB_DATE = datetime(2015, 1, 1, tzinfo=timezone.utc)
+PUB_DATE_SPAN = timedelta(days=365 * 9)
+ROLE_WEIGHTS = ((AUTHENTICATED_USER, 97), (MODERATOR, 2), (ADMIN, 1))
+WORDS = (
+    'фильм', 'книга', 'песня', 'сюжет', 'герой', 'автор', 'финал', 'жанр',
+    'актёры', 'музыка', 'режиссёр', 'роман', 'сцена', 'смысл', 'стиль',
+    'отлично', 'скучно', 'сильно', 'неожиданно', 'красиво', 'затянуто',
+    'впечатляет', 'рекомендую', 'пересмотрю', 'разочарован', 'шедевр',
+)
+
+
+def zipf_counts(total, size, exponent, cap):
+    """Раскладываем total по size позициям по закону Ципфа.
+
+    Число на позиции ограничено cap, поэтому сумма может быть меньше total.
+    """
+    weights = [1 / rank ** exponent for rank in range(1, size + 1)]
+    norm = total / sum(weights)
+    return [min(cap, int(weight * norm + 0.5)) for weight in weights]
+
+
+class Generator:
+    """Потоковая генерация CSV в схеме `static/data`."""
+
+    def __init__(self, output_dir, seed):
+        self.output_dir = output_dir
+        self.random = random.Random(seed)
+
+    def writer(self, file_name, header):
+        f = open(
+            os.path.join(self.output_dir, file_name), 'w',
+            encoding='utf-8', newline=''
+        )
+        writer = csv.writer(f)
+        writer.writerow(header)
+        return f, writer
+
+    def text(self, min_words, max_words):
+        words = self.random.choices(
+            WORDS, k=self.random.randint(min_words, max_words)
+        )
+        return ' '.join(words).capitalize()
+
+    def pub_date(self):
+        moment = FIRST_PUB_DATE + PUB_DATE_SPAN * self.random.random()
+        return moment.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + 'Z'
+
+    def reference(self, file_name, count, prefix):
+        f, writer = self.writer(file_name, ('id', 'name', 'slug'))
+        with f:
+            for pk in range(1, count + 1):
+                writer.writerow((pk, f'{prefix} {pk}', f'{prefix}-{pk}'))
+
+    def users(self, count):
+        roles, weights = zip(*ROLE_WEIGHTS)
+        f, writer = self.writer('users.csv', (
+            'id', 'username', 'email', 'role', 'bio', 'first_name',
+            'last_name'
+        ))
+        with f:
+            for pk in range(1, count + 1):
+                writer.writerow((
+                    pk, f'user{pk}', f'user{pk}@yamdb.fake',
+                    self.random.choices(roles, weights)[0], '', '', ''
+                ))
+
+    def titles(self, count, categories, genres):
+        titles, titles_writer = self.writer(
+            'titles.csv', ('id', 'name', 'year', 'category_id')
+        )
+        links, links_writer = self.writer(
+            'genre_title.csv', ('id', 'title_id', 'genre_id')
+        )
+        link_id = 0
+        with titles, links:
+            for pk in range(1, count + 1):
+                titles_writer.writerow((
+                    pk, self.text(1, 4),
+                    self.random.randint(FIRST_YEAR, LAST_YEAR),
+                    self.random.randint(1, categories)
+                ))
+                title_genres = self.random.sample(
+                    range(1, genres + 1),
+                    k=min(genres, self.random.randint(1, 3))
+                )
+                for genre_id in title_genres:
+                    link_id += 1
+                    links_writer.writerow((link_id, pk, genre_id))
+
+    def reviews(self, total, titles, users, exponent):
+        """Отзывы: популярность произведений распределена по Ципфу.
+
+        Каждый автор оставляет не больше одного отзыва на произведение.
+        """
+        ranks = list(range(1, titles + 1))
+        self.random.shuffle(ranks)
+        counts = zipf_counts(total, titles, exponent, users)
+        f, writer = self.writer('review.csv', (
+            'id', 'title_id', 'text', 'author_id', 'score', 'pub_date'
+        ))
+        review_id = 0
+        with f:
+            for title_id, rank in enumerate(ranks, start=1):
+                quality = self.random.uniform(MIN_SCORE, MAX_SCORE)
+                authors = self.random.sample(
+                    range(1, users + 1), k=counts[rank - 1]
+                )
+                for author_id in authors:
+                    review_id += 1
+                    score = round(self.random.gauss(quality, 2))
+                    writer.writerow((
+                        review_id, title_id, self.text(5, 40), author_id,
+                        max(MIN_SCORE, min(MAX_SCORE, score)),
+                        self.pub_date()
+                    ))
+        return review_id
+
+    def comments(self, total, reviews, users):
+        f, writer = self.writer('comments.csv', (
+            'id', 'review_id', 'text', 'author_id', 'pub_date'
+        ))
+        if not reviews:
+            total = 0
+        with f:
+            for pk in range(1, total + 1):
+                writer.writerow((
+                    pk, self.random.randint(1, reviews), self.text(3, 20),
+                    self.random.randint(1, users), self.pub_date()
+                ))
+
+
+class Command(BaseCommand):
+    """Команда менеджера для генерации тестовых данных в формате CSV."""
+
+    help = 'Generate synthetic CSV dataset for load testing'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--categories', type=int, default=10)
+        parser.add_argument('--genres', type=int, default=50)
+        parser.add_argument('--titles', type=int, default=10000)
+        parser.add_argument('--reviews', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=100000)
+        parser.add_argument(
+            '--zipf', type=float, default=1.1,
+            help='Показатель распределения популярности произведений.'
+        )
+
+    def handle(self, *args, **options):
+        os.makedirs(options['output_dir'], exist_ok=True)
+        generator = Generator(options['output_dir'], options['seed'])
+        generator.reference('category.csv', options['categories'], 'category')
+        generator.reference('genre.csv', options['genres'], 'genre')
+        generator.users(options['users'])
+        generator.titles(
+            options['titles'], options['categories'], options['genres']
+        )
+        reviews = generator.reviews(
+            options['reviews'], options['titles'], options['users'],
+            options['zipf']
+        )
+        generator.comments(options['comments'], reviews, options['users'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Данные записаны в {options["output_dir"]}: '
+            f'{options["titles"]} произведений, {reviews} отзывов'
+        ))
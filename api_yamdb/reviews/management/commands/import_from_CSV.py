@@ -1,9 +1,27 @@
 import csv
+import json
+import os
+import pickle
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from itertools import islice
+
+import django
+from django.apps import apps
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
 
 from reviews.models import (Category, Genre, GenreTitle,
                             Title, User, Review, Comment)
+from reviews.search import rebuild_index
+from reviews.versions import bump_versions
+from users.cache import bump_generation
+from users.tokens import forget_token_version
 
 IMPORT_CSV_FILES = {
     Category: 'category.csv',
@@ -14,6 +32,188 @@ IMPORT_CSV_FILES = {
     Review: 'review.csv',
     Comment: 'comments.csv',
 }
+DEFAULT_DATA_DIR = os.path.join(settings.BASE_DIR, 'static', 'data')
+DEFAULT_BATCH_SIZE = 1000
+CHECKPOINT_FILE = '.import_checkpoint.json'
+SEARCH_MODELS = (Category, Genre, Title, GenreTitle)
+READ_MODEL_SOURCES = (Category, Genre, Title, GenreTitle, Review)
+
+
+def read_rows(path, skip=0):
+    """Построчно читаем CSV, пропуская уже загруженные строки."""
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        yield from islice(csv.DictReader(f), skip, None)
+
+
+def coerce_row(model, row):
+    """Приводим строковые значения CSV к python-типам полей модели."""
+    return {
+        model._meta.get_field(column).attname:
+            model._meta.get_field(column).to_python(value)
+        for column, value in row.items()
+    }
+
+
+def parse_rows(model, path, skip=0):
+    """Читаем и проверяем строки CSV, ошибки привязываем к номеру строки."""
+    for line, row in enumerate(read_rows(path, skip), start=skip + 2):
+        try:
+            yield coerce_row(model, row)
+        except (ValidationError, FieldDoesNotExist) as error:
+            raise CommandError(
+                f'{os.path.basename(path)}, строка {line}: {error}'
+            )
+
+
+def batches(rows, size):
+    rows = iter(rows)
+    batch = list(islice(rows, size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, size))
+
+
+def dependency_order(models):
+    """Упорядочиваем модели так, чтобы цели внешних ключей шли раньше."""
+    models = list(models)
+    depends_on = {
+        model: {
+            field.related_model for field in model._meta.get_fields()
+            if field.many_to_one and field.concrete
+            and field.related_model in models
+            and field.related_model is not model
+        }
+        for model in models
+    }
+    ordered = []
+    while depends_on:
+        ready = [
+            model for model in models
+            if model in depends_on and not depends_on[model] - set(ordered)
+        ]
+        if not ready:
+            raise CommandError('Циклическая зависимость внешних ключей.')
+        for model in ready:
+            ordered.append(model)
+            del depends_on[model]
+    return ordered
+
+
+def init_worker():
+    django.setup()
+
+
+def spool_parsed_file(model_label, path, skip, batch_size, spool_path):
+    """Разбираем CSV в отдельном процессе и сохраняем пачки в файл.
+
+    Родительский процесс читает пачки с диска по одной, поэтому память
+    не растёт вместе с размером файла.
+    """
+    model = apps.get_model(model_label)
+    rows = 0
+    with open(spool_path, 'wb') as spool:
+        for batch in batches(parse_rows(model, path, skip), batch_size):
+            pickle.dump(batch, spool, pickle.HIGHEST_PROTOCOL)
+            rows += len(batch)
+    return rows
+
+
+def read_spool(spool_path):
+    with open(spool_path, 'rb') as spool:
+        while True:
+            try:
+                yield pickle.load(spool)
+            except EOFError:
+                return
+
+
+@contextmanager
+def csv_dates(model, columns):
+    """Сохраняем даты из CSV в полях `auto_now_add`.
+
+    Иначе `bulk_create` заменит их текущим временем, и следующий
+    `--upsert` посчитает все такие строки изменившимися.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False) and field.attname in columns
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def upsert_batch(model, rows):
+    """Вставляем новые и обновляем изменившиеся строки одной пачки.
+
+    Существующие записи ищутся одним запросом по списку id.
+    Возвращает число вставленных, обновлённых и неизменных строк.
+    """
+    existing = model.objects.in_bulk([row['id'] for row in rows])
+    new, changed = [], []
+    fields = set()
+    for row in rows:
+        obj = existing.get(row['id'])
+        if obj is None:
+            new.append(model(**row))
+            continue
+        diff = [
+            attname for attname, value in row.items()
+            if getattr(obj, attname) != value
+        ]
+        if diff:
+            for attname in diff:
+                setattr(obj, attname, row[attname])
+            fields.update(diff)
+            changed.append(obj)
+    # bulk_update минует `User.save`, поэтому смена полей токена
+    # отзывает токены здесь же.
+    revoked = [
+        obj for obj in changed if model is User and obj.claims_changed()
+    ]
+    for user in revoked:
+        user.token_version += 1
+        fields.add('token_version')
+    with csv_dates(model, rows[0]):
+        model.objects.bulk_create(new)
+    if changed:
+        model.objects.bulk_update(changed, sorted(fields))
+    for user in revoked:
+        forget_token_version(user.pk)
+    return len(new), len(changed), len(rows) - len(new) - len(changed)
+
+
+def insert_batch(model, rows):
+    with csv_dates(model, rows[0]):
+        model.objects.bulk_create([model(**row) for row in rows])
+    return len(rows), 0, 0
+
+
+class Checkpoint:
+    """Число строк каждой таблицы, загрузка которых закоммичена."""
+
+    def __init__(self, path, resume):
+        self.path = path
+        self.done = {}
+        if resume and os.path.exists(path):
+            with open(path, encoding='utf-8') as f:
+                self.done = json.load(f)
+
+    def get(self, model):
+        return self.done.get(model._meta.model_name, 0)
+
+    def set(self, model, rows):
+        self.done[model._meta.model_name] = rows
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.done, f)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
 
 
 class Command(BaseCommand):
@@ -21,18 +221,133 @@ class Command(BaseCommand):
 
     help = 'Import CSV'
 
-    def handle(self, *args, **kwargs):
-        for model, file_csv in IMPORT_CSV_FILES.items():
-            print(model, file_csv)
-            with open(
-                f'{settings.BASE_DIR}/static/data/{file_csv}',
-                'r',
-                encoding='utf-8'
-            ) as f:
-                reader = csv.DictReader(f)
-                dump = [model(**row) for row in reader]
-                print(dump)
-                model.objects.bulk_create(dump)
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--data-dir', default=DEFAULT_DATA_DIR,
+            help='Каталог с CSV-файлами.'
+        )
+        parser.add_argument(
+            '--tables', nargs='+', metavar='MODEL',
+            choices=[model._meta.model_name for model in IMPORT_CSV_FILES],
+            help='Загрузить только указанные таблицы (имена моделей).'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Число строк в одном INSERT.'
+        )
+        parser.add_argument(
+            '--commit-every', type=int, default=0, metavar='BATCHES',
+            help=('Коммитить каждые N пачек; по умолчанию таблица '
+                  'загружается в одной транзакции.')
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help='Продолжить с последней закоммиченной пачки.'
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help=('Обновлять существующие записи по id вместо ошибки '
+                  'на повторяющемся ключе.')
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help=('Число процессов для разбора CSV; запись в базу всегда '
+                  'идёт в одном процессе в порядке зависимостей.')
+        )
+
+    def handle(self, *args, **options):
+        data_dir = options['data_dir']
+        if not os.path.isdir(data_dir):
+            raise CommandError(f'Каталог {data_dir} не найден.')
+        tables = options['tables']
+        models = dependency_order(
+            model for model in IMPORT_CSV_FILES
+            if not tables or model._meta.model_name in tables
+        )
+        self.batch_size = options['batch_size']
+        self.commit_every = options['commit_every']
+        self.write_batch = upsert_batch if options['upsert'] else insert_batch
+        self.checkpoint = Checkpoint(
+            os.path.join(data_dir, CHECKPOINT_FILE), options['resume']
+        )
+        paths = {
+            model: os.path.join(data_dir, IMPORT_CSV_FILES[model])
+            for model in models
+        }
+        if options['workers'] > 1:
+            self.import_parallel(models, paths, options['workers'])
+        else:
+            for model in models:
+                rows = parse_rows(
+                    model, paths[model], self.checkpoint.get(model)
+                )
+                self.import_model(model, batches(rows, self.batch_size))
+        self.checkpoint.clear()
+        if Review in models:
+            Title.recalculate_scores()
+        if any(model in SEARCH_MODELS for model in models):
+            rebuild_index()
+        if any(model in READ_MODEL_SOURCES for model in models):
+            call_command('rebuild_title_read_model', stdout=self.stdout)
+        bump_versions(*models)
+        if User in models:
+            # bulk_update не отправляет сигналов, кэши пользователей
+            # воркеров сбрасываем явно.
+            bump_generation()
+
+    def import_parallel(self, models, paths, workers):
+        """Разбираем все файлы параллельно, пишем в порядке зависимостей."""
+        connections.close_all()
+        with tempfile.TemporaryDirectory() as spool_dir, \
+                ProcessPoolExecutor(workers, initializer=init_worker) as pool:
+            futures = {
+                model: pool.submit(
+                    spool_parsed_file, model._meta.label, paths[model],
+                    self.checkpoint.get(model), self.batch_size,
+                    os.path.join(spool_dir, model._meta.model_name)
+                )
+                for model in models
+            }
+            for model in models:
+                futures[model].result()
+                self.import_model(
+                    model,
+                    read_spool(os.path.join(spool_dir, model._meta.model_name))
+                )
+
+    def import_model(self, model, row_batches):
+        committed = self.checkpoint.get(model)
+        if committed:
             self.stdout.write(
-                self.style.SUCCESS(f'Данные для {model.__name__} загружены')
+                f'{model.__name__}: пропускаем {committed} загруженных строк'
             )
+        started = time.monotonic()
+        loaded = inserted = updated = unchanged = 0
+        chunks = (
+            batches(row_batches, self.commit_every) if self.commit_every
+            else [row_batches]
+        )
+        for chunk in chunks:
+            with transaction.atomic():
+                for batch in chunk:
+                    counts = self.write_batch(model, batch)
+                    inserted += counts[0]
+                    updated += counts[1]
+                    unchanged += counts[2]
+                    loaded += len(batch)
+                    self.report_progress(model, loaded, started)
+            self.checkpoint.set(model, committed + loaded)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Данные для {model.__name__} загружены: {loaded} строк '
+                f'(вставлено {inserted}, обновлено {updated}, '
+                f'без изменений {unchanged})'
+            )
+        )
+
+    def report_progress(self, model, loaded, started):
+        elapsed = time.monotonic() - started
+        rate = loaded / elapsed if elapsed else 0
+        self.stdout.write(
+            f'{model.__name__}: {loaded} строк, {rate:.0f} строк/с'
+        )
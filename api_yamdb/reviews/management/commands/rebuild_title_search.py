@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from reviews.search import rebuild_index
+
+
+class Command(BaseCommand):
+    """Команда менеджера для перестроения поискового индекса произведений."""
+
+    help = 'Rebuild title full-text search index'
+
+    def handle(self, *args, **kwargs):
+        total = rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS(f'Проиндексировано произведений: {total}')
+        )
@@ -0,0 +1,75 @@
+from django.db import migrations, models, transaction
+from django.db.models import (Case, Count, F, IntegerField, OuterRef,
+                              Subquery, Sum, When)
+from django.db.models.functions import Cast, Coalesce, Round
+
+CHUNK_SIZE = 1000
+
+
+def backfill_scores(apps, schema_editor):
+    """Заполняем агрегаты оценок по отзывам пачками произведений."""
+    alias = schema_editor.connection.alias
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    titles = Title.objects.using(alias).order_by('pk')
+    reviews = Review.objects.using(alias).filter(
+        title=OuterRef('pk')
+    ).order_by().values('title')
+    last_pk = 0
+    while True:
+        pks = list(
+            titles.filter(pk__gt=last_pk).values_list('pk', flat=True)[
+                :CHUNK_SIZE
+            ]
+        )
+        if not pks:
+            return
+        last_pk = pks[-1]
+        chunk = Title.objects.using(alias).filter(pk__in=pks)
+        with transaction.atomic(using=alias):
+            chunk.update(
+                score_sum=Coalesce(
+                    Subquery(reviews.annotate(total=Sum('score'))
+                             .values('total')), 0
+                ),
+                score_count=Coalesce(
+                    Subquery(reviews.annotate(total=Count('pk'))
+                             .values('total')), 0
+                ),
+            )
+            chunk.update(rating=Case(
+                When(score_count=0, then=None),
+                default=Cast(
+                    Round(F('score_sum') * 1.0 / F('score_count')),
+                    output_field=IntegerField()
+                ),
+                output_field=IntegerField()
+            ))
+
+
+class Migration(migrations.Migration):
+    # Каждая пачка фиксируется отдельно; повторный запуск безопасен.
+    atomic = False
+
+    dependencies = [
+        ('reviews', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='score_sum',
+            field=models.PositiveIntegerField(default=0, verbose_name='Сумма оценок'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='score_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='Число оценок'),
+        ),
+        migrations.AlterField(
+            model_name='title',
+            name='rating',
+            field=models.PositiveSmallIntegerField(blank=True, default=None, null=True, verbose_name='Рейтинг'),
+        ),
+        migrations.RunPython(backfill_scores, migrations.RunPython.noop),
+    ]
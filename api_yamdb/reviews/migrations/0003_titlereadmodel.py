@@ -0,0 +1,29 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0002_title_scores'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TitleReadModel',
+            fields=[
+                ('title', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='read_model', serialize=False, to='reviews.title', verbose_name='Произведение')),
+                ('year', models.PositiveSmallIntegerField(verbose_name='Год выпуска')),
+                ('category_slug', models.SlugField(blank=True, verbose_name='Slug категории')),
+                ('genre_slugs', models.TextField(blank=True, verbose_name='Slug жанров через запятую')),
+                ('rating', models.PositiveSmallIntegerField(blank=True, null=True, verbose_name='Рейтинг')),
+                ('reviews_count', models.PositiveIntegerField(default=0, verbose_name='Число отзывов')),
+                ('json', models.TextField(verbose_name='JSON произведения')),
+            ],
+            options={
+                'verbose_name': 'Представление произведения',
+                'verbose_name_plural': 'Представления произведений',
+                'ordering': ['title'],
+            },
+        ),
+    ]
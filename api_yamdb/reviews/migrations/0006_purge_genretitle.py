@@ -0,0 +1,38 @@
+from django.db import migrations
+from django.db.models import Min, Q
+
+CHUNK_SIZE = 1000
+
+
+def delete_in_chunks(queryset):
+    """Удаляем строки пачками, чтобы не держать длинную блокировку."""
+    rows = queryset.model._default_manager.using(queryset.db)
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:CHUNK_SIZE])
+        if not pks:
+            return
+        rows.filter(pk__in=pks).delete()
+
+
+def purge_links(apps, schema_editor):
+    """Удаляем связи без жанра или произведения и дубликаты пар."""
+    GenreTitle = apps.get_model('reviews', 'GenreTitle')
+    links = GenreTitle.objects.using(schema_editor.connection.alias)
+    delete_in_chunks(links.filter(Q(title=None) | Q(genre=None)))
+    first_links = links.order_by().values('title', 'genre').annotate(
+        first=Min('pk')
+    ).values('first')
+    delete_in_chunks(links.exclude(pk__in=first_links))
+
+
+class Migration(migrations.Migration):
+    # Каждая пачка фиксируется отдельно; повторный запуск безопасен.
+    atomic = False
+
+    dependencies = [
+        ('reviews', '0005_title_category_year_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(purge_links, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.2 on 2026-10-18 20:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0008_review_comment_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='titlereadmodel',
+            name='category_slug',
+        ),
+        migrations.RemoveField(
+            model_name='titlereadmodel',
+            name='genre_slugs',
+        ),
+        migrations.RemoveField(
+            model_name='titlereadmodel',
+            name='rating',
+        ),
+        migrations.RemoveField(
+            model_name='titlereadmodel',
+            name='reviews_count',
+        ),
+        migrations.RemoveField(
+            model_name='titlereadmodel',
+            name='year',
+        ),
+    ]
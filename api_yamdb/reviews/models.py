@@ -1,12 +1,25 @@
 from django.contrib.auth import get_user_model
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import (Case, Count, F, IntegerField, OuterRef,
+                              Subquery, Sum, When)
+from django.db.models.functions import Cast, Coalesce, Round
+from django.db.models.signals import m2m_changed
 
 User = get_user_model()
 
 MIN_SCORE = 1
 MAX_SCORE = 10
 
+RATING_EXPRESSION = Case(
+    When(score_count=0, then=None),
+    default=Cast(
+        Round(F('score_sum') * 1.0 / F('score_count')),
+        output_field=IntegerField()
+    ),
+    output_field=IntegerField()
+)
+
 
 class Category(models.Model):
     """Модель категорий."""
@@ -56,28 +69,148 @@ class Title(models.Model):
         related_name='titles',
         verbose_name='Категория'
     )
-    rating = models.PositiveSmallIntegerField(default=0,
+    score_sum = models.PositiveIntegerField(default=0,
+                                            verbose_name='Сумма оценок')
+    score_count = models.PositiveIntegerField(default=0,
+                                              verbose_name='Число оценок')
+    rating = models.PositiveSmallIntegerField(blank=True, null=True,
+                                              default=None,
                                               verbose_name='Рейтинг')
 
     class Meta:
         ordering = ['id']
+        indexes = [
+            models.Index(fields=['rating', 'id'],
+                         name='title_rating_id_idx'),
+            models.Index(fields=['year', 'id'], name='title_year_id_idx'),
+            models.Index(fields=['name', 'id'], name='title_name_id_idx'),
+            models.Index(fields=['score_count', 'id'],
+                         name='title_score_count_id_idx'),
+            models.Index(fields=['category', 'year'],
+                         name='title_category_year_idx'),
+        ]
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
 
     def __str__(self):
         return self.name
 
+    @classmethod
+    def change_scores(cls, title_id, score_delta, count_delta):
+        """Сдвигаем сумму и число оценок и пересчитываем рейтинг."""
+        titles = cls.objects.filter(pk=title_id)
+        with transaction.atomic():
+            titles.update(
+                score_sum=F('score_sum') + score_delta,
+                score_count=F('score_count') + count_delta,
+            )
+            titles.update(rating=RATING_EXPRESSION)
+
+    @classmethod
+    def recalculate_scores(cls, queryset=None):
+        """Пересчитываем агрегаты оценок по таблице отзывов.
+
+        Нужен после массовых операций, минующих сигналы (bulk_create).
+        """
+        if queryset is None:
+            queryset = cls.objects.all()
+        reviews = Review.objects.filter(
+            title=OuterRef('pk')
+        ).order_by().values('title')
+        with transaction.atomic():
+            queryset.update(
+                score_sum=Coalesce(
+                    Subquery(reviews.annotate(total=Sum('score'))
+                             .values('total')), 0
+                ),
+                score_count=Coalesce(
+                    Subquery(reviews.annotate(total=Count('pk'))
+                             .values('total')), 0
+                ),
+            )
+            queryset.update(rating=RATING_EXPRESSION)
+
+    def set_genres(self, genres):
+        """Заменяем жанры, трогая только отличающиеся связи.
+
+        В отличие от `genre.set()` недостающие связи вставляются без
+        повторной проверки: дубликаты отсекает уникальный индекс.
+        Сигналы `m2m_changed` отправляются как при `remove()`/`add()`.
+        """
+        links = dict(
+            GenreTitle.objects.filter(title=self).values_list('genre', 'pk')
+        )
+        new_ids = {genre.pk for genre in genres}
+        removed = links.keys() - new_ids
+        added = new_ids - links.keys()
+        signal = {'sender': GenreTitle, 'instance': self, 'reverse': False,
+                  'model': Genre, 'using': self._state.db}
+        prefetched = getattr(self, '_prefetched_objects_cache', {})
+        prefetched.pop('genre', None)
+        prefetched.pop('genretitle_set', None)
+        with transaction.atomic():
+            if removed:
+                m2m_changed.send(action='pre_remove', pk_set=removed,
+                                 **signal)
+                GenreTitle.objects.filter(
+                    pk__in=[links[genre_id] for genre_id in removed]
+                ).delete()
+                m2m_changed.send(action='post_remove', pk_set=removed,
+                                 **signal)
+            if added:
+                m2m_changed.send(action='pre_add', pk_set=added, **signal)
+                GenreTitle.objects.bulk_create(
+                    [GenreTitle(title=self, genre_id=genre_id)
+                     for genre_id in added],
+                    ignore_conflicts=True
+                )
+                m2m_changed.send(action='post_add', pk_set=added, **signal)
+
+
+class TitleReadModel(models.Model):
+    """Денормализованное представление произведения для чтения.
+
+    Хранит готовый JSON произведения в формате ответа API; фильтры и
+    сортировка работают по `Title`. Поддерживается хуками из
+    `api.read_model`.
+    """
+
+    title = models.OneToOneField(
+        Title, on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='read_model',
+        verbose_name='Произведение'
+    )
+    json = models.TextField(verbose_name='JSON произведения')
+
+    class Meta:
+        ordering = ['title']
+        verbose_name = 'Представление произведения'
+        verbose_name_plural = 'Представления произведений'
+
+    def __str__(self):
+        return str(self.title_id)
+
 
 class GenreTitle(models.Model):
     """Связная таблица жанры-произведения."""
 
-    genre = models.ForeignKey(Genre, on_delete=models.SET_NULL,
-                              null=True, verbose_name='Жанр')
-    title = models.ForeignKey(Title, on_delete=models.SET_NULL,
-                              null=True, verbose_name='Произведение')
+    # Одиночные индексы не нужны: их покрывают составные ниже.
+    genre = models.ForeignKey(Genre, on_delete=models.CASCADE,
+                              db_index=False, verbose_name='Жанр')
+    title = models.ForeignKey(Title, on_delete=models.CASCADE,
+                              db_index=False, verbose_name='Произведение')
 
     class Meta:
         ordering = ['id']
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'genre'],
+                                    name='unique_title_genre'),
+        ]
+        indexes = [
+            models.Index(fields=['genre', 'title'],
+                         name='genretitle_genre_title_idx'),
+        ]
         verbose_name = 'Жанр произведения'
         verbose_name_plural = 'Жанр произведений'
 
@@ -92,6 +225,7 @@ class Review(models.Model):
         Title,
         on_delete=models.CASCADE,
         related_name='reviews',
+        db_index=False,
         verbose_name='Название'
     )
     text = models.TextField(
@@ -101,6 +235,7 @@ class Review(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='reviews',
+        db_index=False,
         verbose_name='Автор'
     )
     score = models.PositiveSmallIntegerField(
@@ -114,14 +249,28 @@ class Review(models.Model):
     )
 
     class Meta:
-        ordering = ['pub_date']
-        unique_together = ('title', 'author')
+        ordering = ['pub_date', 'id']
+        constraints = [
+            models.UniqueConstraint(fields=['title', 'author'],
+                                    name='unique_review_title_author'),
+        ]
+        indexes = [
+            models.Index(fields=['title', 'pub_date', 'id'],
+                         name='review_title_pub_date_idx'),
+            models.Index(fields=['author', 'pub_date'],
+                         name='review_author_pub_date_idx'),
+        ]
         verbose_name = 'Отзыв'
         verbose_name_plural = 'Отзывы'
 
     def __str__(self):
         return self.text
 
+    def save(self, *args, **kwargs):
+        """Сохраняем отзыв и агрегаты произведения в одной транзакции."""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(models.Model):
     """Модель комментариев к отзывам."""
@@ -130,6 +279,7 @@ class Comment(models.Model):
         Review,
         on_delete=models.CASCADE,
         related_name='comments',
+        db_index=False,
         verbose_name='Отзыв'
     )
     text = models.TextField(verbose_name='Текст комментария')
@@ -137,6 +287,7 @@ class Comment(models.Model):
         User,
         on_delete=models.CASCADE,
         related_name='comments',
+        db_index=False,
         verbose_name='Автор'
     )
     pub_date = models.DateTimeField(
@@ -145,7 +296,13 @@ class Comment(models.Model):
     )
 
     class Meta:
-        ordering = ['pub_date']
+        ordering = ['pub_date', 'id']
+        indexes = [
+            models.Index(fields=['review', 'pub_date', 'id'],
+                         name='comment_review_pub_date_idx'),
+            models.Index(fields=['author', 'pub_date'],
+                         name='comment_author_pub_date_idx'),
+        ]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -0,0 +1,150 @@
+"""Полнотекстовый индекс произведений на SQLite FTS5.
+
+Индекс хранится в виртуальной таблице, rowid строки совпадает с id
+произведения. Таблица создаётся и при пустом индексе заполняется после
+миграций, дальше синхронизируется сигналами из `reviews.signals`;
+полностью перестраивается командой `rebuild_title_search`.
+"""
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'reviews_title_search'
+INDEX_BATCH_SIZE = 500
+TOKEN_PATTERN = re.compile(r'\w+')
+
+
+def search_available():
+    return connection.vendor == 'sqlite'
+
+
+def ensure_search_table():
+    """Создаём виртуальную таблицу индекса, если её ещё нет."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5('
+            'name, description, category, genres, '
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+
+
+def create_search_table(**kwargs):
+    """Создаём таблицу индекса и заполняем её, если она пуста.
+
+    На обновляемой базе произведения уже есть, а только что созданный
+    индекс пуст, и поиск не находил бы ничего до `rebuild_title_search`.
+    """
+    from reviews.models import Title
+
+    if not search_available():
+        return
+    ensure_search_table()
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT 1 FROM {SEARCH_TABLE} LIMIT 1')
+        indexed = cursor.fetchone() is not None
+    if not indexed and Title.objects.exists():
+        rebuild_index()
+
+
+def build_match_query(text):
+    """Превращаем пользовательский ввод в безопасный запрос FTS5.
+
+    Каждое слово ищется как префикс, все слова должны встретиться.
+    """
+    tokens = TOKEN_PATTERN.findall(text)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _title_rows(title_ids):
+    from reviews.models import GenreTitle, Title
+
+    titles = Title.objects.filter(pk__in=title_ids).values_list(
+        'pk', 'name', 'description', 'category__name'
+    )
+    genres = {}
+    links = GenreTitle.objects.filter(
+        title_id__in=title_ids, genre__isnull=False
+    ).values_list('title_id', 'genre__name')
+    for title_id, genre_name in links:
+        genres.setdefault(title_id, []).append(genre_name)
+    for pk, name, description, category in titles:
+        yield (
+            pk, name, description or '', category or '',
+            ' '.join(genres.get(pk, ()))
+        )
+
+
+def remove_titles(title_ids):
+    if not search_available() or not title_ids:
+        return
+    title_ids = list(title_ids)
+    with connection.cursor() as cursor:
+        for start in range(0, len(title_ids), INDEX_BATCH_SIZE):
+            batch = title_ids[start:start + INDEX_BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(
+                f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})',
+                batch
+            )
+
+
+def index_titles(title_ids):
+    """Переиндексируем указанные произведения."""
+    if not search_available():
+        return
+    title_ids = list(title_ids)
+    for start in range(0, len(title_ids), INDEX_BATCH_SIZE):
+        batch = title_ids[start:start + INDEX_BATCH_SIZE]
+        remove_titles(batch)
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {SEARCH_TABLE} '
+                '(rowid, name, description, category, genres) '
+                'VALUES (%s, %s, %s, %s, %s)',
+                list(_title_rows(batch))
+            )
+
+
+def rebuild_index():
+    """Перестраиваем индекс целиком, возвращаем число произведений."""
+    from reviews.models import Title
+
+    ensure_search_table()
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {SEARCH_TABLE}')
+    title_ids = Title.objects.order_by('pk').values_list('pk', flat=True)
+    batch = []
+    total = 0
+    for title_id in title_ids.iterator(chunk_size=INDEX_BATCH_SIZE):
+        batch.append(title_id)
+        if len(batch) == INDEX_BATCH_SIZE:
+            index_titles(batch)
+            total += len(batch)
+            batch = []
+    index_titles(batch)
+    return total + len(batch)
+
+
+def search_titles(queryset, text):
+    """Фильтруем произведения по индексу и сортируем по релевантности."""
+    match = build_match_query(text)
+    if not match:
+        return queryset.none()
+    if not search_available():
+        return queryset.filter(name__icontains=text)
+    table = queryset.model._meta.db_table
+    return queryset.filter(
+        pk__in=RawSQL(
+            f'SELECT rowid FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s',
+            (match,)
+        )
+    ).annotate(
+        search_rank=RawSQL(
+            f'SELECT rank FROM {SEARCH_TABLE} '
+            f'WHERE {SEARCH_TABLE} MATCH %s '
+            f'AND rowid = {table}.id',
+            (match,)
+        )
+    ).order_by('search_rank', 'pk')
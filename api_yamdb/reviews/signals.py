@@ -0,0 +1,154 @@
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from reviews import search
+from reviews.versions import bump_versions
+from reviews.models import (Category, Comment, Genre, GenreTitle, Review,
+                            Title, User)
+
+
+def related_title_ids(instance):
+    if isinstance(instance, Category):
+        return instance.titles.values_list('pk', flat=True)
+    return instance.title_set.values_list('pk', flat=True)
+
+
+@receiver(pre_save, sender=Review)
+def remember_stored_score(sender, instance, update_fields=None, **kwargs):
+    """Читаем из базы оценку и произведение, которые заменит сохранение.
+
+    Строка блокируется до конца транзакции `Review.save`, поэтому
+    параллельные изменения одного отзыва считают разницу по очереди.
+    """
+    instance._stored_score = None
+    if instance.pk is None or (
+        update_fields is not None
+        and not {'score', 'title'} & set(update_fields)
+    ):
+        return
+    instance._stored_score = Review.objects.select_for_update().filter(
+        pk=instance.pk
+    ).values_list('score', 'title_id').first()
+
+
+@receiver(post_save, sender=Review)
+def update_title_scores_on_save(sender, instance, created, **kwargs):
+    """Учитываем новую оценку или её изменение в агрегатах произведения."""
+    stored = instance.__dict__.pop('_stored_score', None)
+    if created:
+        Title.change_scores(instance.title_id, instance.score, 1)
+        return
+    if stored is None:
+        return
+    score, title_id = stored
+    if title_id != instance.title_id:
+        Title.change_scores(title_id, -score, -1)
+        Title.change_scores(instance.title_id, instance.score, 1)
+    elif score != instance.score:
+        Title.change_scores(instance.title_id, instance.score - score, 0)
+
+
+@receiver(post_delete, sender=Review)
+def update_title_scores_on_delete(sender, instance, **kwargs):
+    """Убираем оценку удалённого отзыва, в том числе при каскаде."""
+    Title.change_scores(instance.title_id, -instance.score, -1)
+
+
+@receiver(post_save, sender=Title)
+def index_title_on_save(sender, instance, **kwargs):
+    search.index_titles([instance.pk])
+
+
+@receiver(post_delete, sender=Title)
+def remove_title_from_index(sender, instance, **kwargs):
+    search.remove_titles([instance.pk])
+
+
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+def bump_title_reviews_version(sender, instance, **kwargs):
+    """Версия отзывов произведения — для ETag их списка."""
+    bump_versions(Review, scope=instance.title_id)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def bump_review_comments_version(sender, instance, **kwargs):
+    """Версия комментариев отзыва — для ETag их списка."""
+    bump_versions(Comment, scope=instance.review_id)
+
+
+@receiver(m2m_changed, sender=GenreTitle)
+def index_title_on_genres_change(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    if reverse and action == 'pre_clear':
+        instance._cleared_title_ids = list(related_title_ids(instance))
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        search.index_titles([instance.pk])
+    elif pk_set:
+        search.index_titles(pk_set)
+    else:
+        search.index_titles(getattr(instance, '_cleared_title_ids', ()))
+
+
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_delete, sender=GenreTitle)
+def index_title_on_link_change(sender, instance, **kwargs):
+    if instance.title_id is not None:
+        search.index_titles([instance.title_id])
+
+
+@receiver(pre_delete, sender=Category)
+@receiver(pre_delete, sender=Genre)
+def remember_indexed_titles(sender, instance, **kwargs):
+    """Запоминаем произведения, которые потеряют категорию или жанр."""
+    instance._indexed_title_ids = list(related_title_ids(instance))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+def index_titles_on_reference_change(sender, instance, created=False,
+                                     **kwargs):
+    if created:
+        return
+    title_ids = getattr(instance, '_indexed_title_ids', None)
+    if title_ids is None:
+        title_ids = related_title_ids(instance)
+    search.index_titles(title_ids)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Title)
+@receiver(post_save, sender=GenreTitle)
+@receiver(post_save, sender=Review)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Category)
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Title)
+@receiver(post_delete, sender=GenreTitle)
+@receiver(post_delete, sender=Review)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=User)
+def bump_model_version(sender, **kwargs):
+    bump_versions(sender)
+
+
+@receiver(m2m_changed, sender=GenreTitle)
+def bump_version_on_genres_change(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_versions(GenreTitle)
+
+
+@receiver(post_save, sender=User)
+def bump_version_on_username_change(sender, instance, created, **kwargs):
+    """Имя автора выводится в отзывах и комментариях."""
+    loaded_username = getattr(instance, '_loaded_username', None)
+    if not created and loaded_username != instance.username:
+        bump_versions(User)
+    instance._loaded_username = instance.username
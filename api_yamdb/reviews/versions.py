@@ -0,0 +1,107 @@
+"""Счётчики версий моделей каталога.
+
+Версия модели меняется при любой записи в её таблицу; по версиям
+проверяется актуальность закэшированных ответов API и строятся ETag.
+Вместе с версией запоминается время изменения для Last-Modified.
+Версия с областью `scope` (например, отзывы одного произведения)
+меняется только при записи строк этой области.
+Счётчики хранятся в кэше Django и общие для всех процессов, только если
+общий сам кэш: `check_shared_cache` не даёт запустить несколько процессов
+с кэшем в памяти процесса. Версия живёт не дольше
+`MODEL_VERSION_TIMEOUT` секунд: запись, чей сдвиг версии не дошёл до
+кэша сервера (например, команда в отдельном процессе при LocMemCache),
+не даёт отвечать 304 и отдавать старый кэш дольше этого срока.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import transaction
+
+KEY_PREFIX = 'model-version'
+MODIFIED_KEY_PREFIX = 'model-modified'
+
+
+def check_shared_cache():
+    """Проверяем, что кэш виден всем `WEB_CONCURRENCY` процессам."""
+    backend = caches[DEFAULT_CACHE_ALIAS]
+    if settings.WEB_CONCURRENCY > 1 and isinstance(backend, LocMemCache):
+        raise ImproperlyConfigured(
+            'Кэш в памяти процесса не подходит для нескольких процессов '
+            f'(WEB_CONCURRENCY={settings.WEB_CONCURRENCY}): версии моделей '
+            'и токенов разойдутся между ними. Укажите общий бэкенд в '
+            'CACHE_BACKEND и CACHE_LOCATION.'
+        )
+
+
+def _scoped(key, scope):
+    return key if scope is None else f'{key}:{scope}'
+
+
+def version_key(model, scope=None):
+    return _scoped(f'{KEY_PREFIX}:{model._meta.label_lower}', scope)
+
+
+def modified_key(model, scope=None):
+    return _scoped(f'{MODIFIED_KEY_PREFIX}:{model._meta.label_lower}', scope)
+
+
+def _increment(model, scope=None):
+    key = version_key(model, scope)
+    timeout = settings.MODEL_VERSION_TIMEOUT
+    # Ключ мог истечь или быть вытеснен из кэша: начинаем с метки
+    # времени, чтобы не совпасть ни с одной из ранее выданных версий.
+    cache.add(key, time.time_ns(), timeout)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout)
+    cache.set(modified_key(model, scope), time.time(), timeout)
+
+
+def bump_versions(*models, scope=None):
+    """Меняем версии сразу и ещё раз после коммита транзакции.
+
+    Второй сдвиг не даёт закэшировать данные, прочитанные между первым
+    сдвигом и коммитом.
+    """
+    for model in models:
+        _increment(model, scope)
+    transaction.on_commit(
+        lambda: [_increment(model, scope) for model in models]
+    )
+
+
+def version_keys(models, scope=None):
+    return [version_key(model, scope) for model in models]
+
+
+def modified_keys(models, scope=None):
+    return [modified_key(model, scope) for model in models]
+
+
+def current_versions(models, scope=None):
+    """Текущие версии моделей; недостающие в кэше создаём заново.
+
+    Новая версия могла пропустить изменения, поэтому временем изменения
+    модели становится момент её создания.
+    """
+    keys = version_keys(models, scope)
+    found = cache.get_many(keys)
+    timeout = settings.MODEL_VERSION_TIMEOUT
+    for model, key in zip(models, keys):
+        if found.get(key) is None:
+            if cache.add(key, time.time_ns(), timeout):
+                cache.set(modified_key(model, scope), time.time(), timeout)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def last_modified(models, scope=None):
+    """Время последнего изменения моделей или None, если оно неизвестно."""
+    found = cache.get_many(modified_keys(models, scope))
+    if len(found) < len(models):
+        return None
+    return max(found.values())
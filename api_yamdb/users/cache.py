@@ -0,0 +1,162 @@
+"""LRU-кэш строк пользователей в памяти процесса.
+
+Строки хранятся по id, второй индекс ведёт от username к id. Запись
+живёт не дольше `USER_CACHE_TIMEOUT` секунд, при переполнении
+`USER_CACHE_SIZE` вытесняется самая давно использованная. Сигналы
+`post_save`/`post_delete` сразу убирают пользователя из кэша своего
+процесса и увеличивают общее поколение в кэше Django; другие воркеры
+сверяют поколение не чаще `USER_CACHE_CHECK_INTERVAL` и при смене
+очищают кэш целиком. Вызовы с `force_check` читают строку из базы в
+обход кэша и обновляют её в кэше: их используют там, где устаревшие
+данные недопустимы (код подтверждения, изменение и удаление
+пользователя), в том числе после записей мимо сигналов.
+
+Кэш отдаёт новый экземпляр модели на каждое обращение, поэтому его можно
+изменять и сохранять. `QuerySet.update()` сигналов не отправляет, после
+него нужен `user_cache.invalidate()`.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.db.models.signals import post_delete, post_save
+
+GENERATION_KEY = 'user-cache-generation'
+
+
+def current_generation():
+    generation = cache.get(GENERATION_KEY)
+    if generation is None:
+        # Ключ мог быть вытеснен: начинаем с метки времени, чтобы не
+        # совпасть ни с одним из ранее выданных поколений.
+        cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+        generation = cache.get(GENERATION_KEY)
+    return generation
+
+
+def bump_generation():
+    cache.add(GENERATION_KEY, time.time_ns(), timeout=None)
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, time.time_ns(), timeout=None)
+
+
+class UserCache:
+
+    def __init__(self, model):
+        self.model = model
+        self.fields = [field.attname for field in model._meta.concrete_fields]
+        self.pk_index = self.fields.index(model._meta.pk.attname)
+        self.username_index = self.fields.index(model.USERNAME_FIELD)
+        self.rows = OrderedDict()
+        self.usernames = {}
+        self.generation = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        post_save.connect(self.on_change, sender=model, weak=False)
+        post_delete.connect(self.on_change, sender=model, weak=False)
+
+    def check_generation(self, force_check):
+        now = time.monotonic()
+        if (
+            not force_check
+            and now - self.checked_at < settings.USER_CACHE_CHECK_INTERVAL
+        ):
+            return
+        generation = current_generation()
+        with self.lock:
+            if generation != self.generation:
+                self.rows.clear()
+                self.usernames.clear()
+                self.generation = generation
+            self.checked_at = now
+
+    def lookup(self, pk):
+        with self.lock:
+            entry = self.rows.get(pk)
+            if entry is None:
+                return None
+            expires, values = entry
+            if expires < time.monotonic():
+                self.forget(pk)
+                return None
+            self.rows.move_to_end(pk)
+            return values
+
+    def store(self, values):
+        pk = values[self.pk_index]
+        expires = time.monotonic() + settings.USER_CACHE_TIMEOUT
+        with self.lock:
+            self.forget(pk)
+            self.rows[pk] = (expires, values)
+            self.usernames[values[self.username_index]] = pk
+            while len(self.rows) > settings.USER_CACHE_SIZE:
+                _, (_, old_values) = self.rows.popitem(last=False)
+                self.usernames.pop(old_values[self.username_index], None)
+                self.evictions += 1
+
+    def forget(self, pk):
+        entry = self.rows.pop(pk, None)
+        if entry is not None:
+            username = entry[1][self.username_index]
+            if self.usernames.get(username) == pk:
+                del self.usernames[username]
+
+    def get(self, force_check=False, **lookup):
+        """Пользователь по id (`pk=`) или username либо None.
+
+        С `force_check` строка всегда читается из базы.
+        """
+        (field, key), = lookup.items()
+        self.check_generation(force_check)
+        if field == 'pk':
+            pk = key
+        else:
+            pk = self.usernames.get(key)
+        values = None if pk is None or force_check else self.lookup(pk)
+        if values is None:
+            self.misses += 1
+            values = self.model._default_manager.filter(
+                **lookup
+            ).values_list(*self.fields).first()
+            if values is None:
+                return None
+            self.store(values)
+        else:
+            self.hits += 1
+        return self.model.from_db(DEFAULT_DB_ALIAS, self.fields, values)
+
+    def by_id(self, pk, force_check=False):
+        return self.get(force_check, pk=pk)
+
+    def by_username(self, username, force_check=False):
+        return self.get(force_check, username=username)
+
+    def invalidate(self, pk):
+        with self.lock:
+            self.forget(pk)
+        bump_generation()
+        # Строку, прочитанную до коммита другим потоком, тоже сбрасываем.
+        transaction.on_commit(bump_generation)
+
+    def on_change(self, instance, **kwargs):
+        self.invalidate(instance.pk)
+
+    def stats(self):
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.rows),
+        }
+
+
+user_cache = UserCache(get_user_model())
@@ -0,0 +1,190 @@
+"""Очередь исходящих писем.
+
+Запрос только добавляет строку `QueuedEmail` в той же транзакции, что и
+остальные изменения, и не ждёт почтового сервера. Письма отправляет
+`manage.py send_queued_emails`: основной поток забирает пачку писем,
+продлевая им срок следующей попытки на `EMAIL_QUEUE_LEASE` секунд
+(письма упавшего воркера уйдут после его истечения), и раздаёт её пулу
+потоков. Каждый поток держит одно соединение с почтовым сервером на все
+свои письма. Отправленные письма удаляются, неудачные повторяются с
+экспоненциальной задержкой, после `EMAIL_QUEUE_MAX_ATTEMPTS` попыток
+письмо помечается как неотправленное.
+
+При `EMAIL_QUEUE_EAGER` письмо отправляется сразу после коммита в том же
+процессе — для тестов и локальной разработки без воркера.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from users.models import QueuedEmail
+
+
+def enqueue_email(subject, body, to):
+    """Ставим письмо в очередь, отправка — после коммита."""
+    queued = QueuedEmail.objects.create(
+        subject=subject, body=body, to=to,
+        from_email=settings.DEFAULT_FROM_EMAIL
+    )
+    if settings.EMAIL_QUEUE_EAGER:
+        transaction.on_commit(lambda: deliver([queued]))
+    return queued
+
+
+def claim(queued, now, lease):
+    """Продлеваем срок письма, если его ещё не забрал другой воркер."""
+    claimed = QueuedEmail.objects.filter(
+        pk=queued.pk, status=QueuedEmail.PENDING, next_attempt_at__lte=now
+    ).update(next_attempt_at=lease)
+    if claimed:
+        queued.next_attempt_at = lease
+    return bool(claimed)
+
+
+def claim_batch(size):
+    """Забираем пачку писем, срок которых подошёл.
+
+    Каждое письмо захватывается условным UPDATE, в пачку попадают только
+    захваченные этим воркером: так несколько воркеров не отправят одно
+    письмо дважды и без блокировок строк, которых нет в SQLite.
+    """
+    now = timezone.now()
+    lease = now + timedelta(seconds=settings.EMAIL_QUEUE_LEASE)
+    candidates = QueuedEmail.objects.filter(
+        status=QueuedEmail.PENDING, next_attempt_at__lte=now
+    )[:size]
+    return [queued for queued in candidates if claim(queued, now, lease)]
+
+
+def retry_delay(attempts):
+    """Задержка перед следующей попыткой: удваивается с каждой неудачей."""
+    return timedelta(
+        seconds=settings.EMAIL_QUEUE_RETRY_DELAY * 2 ** (attempts - 1)
+    )
+
+
+def record_results(results):
+    """Удаляем отправленные письма, неудачным назначаем новую попытку.
+
+    `results` — пары (письмо, исключение или None). Возвращает число
+    отправленных, отложенных и окончательно неотправленных писем.
+    """
+    sent = [queued.pk for queued, error in results if error is None]
+    QueuedEmail.objects.filter(pk__in=sent).delete()
+    retried = failed = 0
+    now = timezone.now()
+    for queued, error in results:
+        if error is None:
+            continue
+        queued.attempts += 1
+        queued.last_error = f'{type(error).__name__}: {error}'
+        if queued.attempts >= settings.EMAIL_QUEUE_MAX_ATTEMPTS:
+            queued.status = QueuedEmail.FAILED
+            failed += 1
+        else:
+            queued.next_attempt_at = now + retry_delay(queued.attempts)
+            retried += 1
+        queued.save(update_fields=[
+            'attempts', 'last_error', 'status', 'next_attempt_at'
+        ])
+    return len(sent), retried, failed
+
+
+def as_message(queued, connection):
+    return EmailMessage(
+        queued.subject, queued.body, queued.from_email, [queued.to],
+        connection=connection
+    )
+
+
+def send_with(connection, batch):
+    """Отправляем письма по одному через общее соединение.
+
+    Соединение открываем сами: иначе бэкенд открывает и закрывает его
+    на каждый вызов `send_messages`.
+    """
+    results = []
+    for queued in batch:
+        try:
+            connection.open()
+            connection.send_messages([as_message(queued, connection)])
+        except Exception as error:
+            results.append((queued, error))
+            # После ошибки соединение могло остаться в неясном состоянии.
+            connection.close()
+        else:
+            results.append((queued, None))
+    return results
+
+
+def deliver(batch):
+    """Отправляем пачку в текущем потоке одним соединением."""
+    connection = get_connection()
+    try:
+        return record_results(send_with(connection, batch))
+    finally:
+        connection.close()
+
+
+class Dispatcher:
+    """Пул потоков отправки; у каждого потока своё соединение."""
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(workers)
+        self.local = threading.local()
+        self.connections = []
+        self.lock = threading.Lock()
+
+    def connection(self):
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = get_connection()
+            self.local.connection = connection
+            with self.lock:
+                self.connections.append(connection)
+        return connection
+
+    def send_chunk(self, chunk):
+        return send_with(self.connection(), chunk)
+
+    def run_once(self, batch_size):
+        """Отправляем одну пачку; возвращаем (отправлено, отложено, ошибок)."""
+        batch = claim_batch(batch_size)
+        if not batch:
+            return 0, 0, 0
+        chunks = [
+            batch[start::self.workers] for start in range(self.workers)
+        ]
+        results = []
+        for chunk_results in self.pool.map(
+            self.send_chunk, [chunk for chunk in chunks if chunk]
+        ):
+            results.extend(chunk_results)
+        return record_results(results)
+
+    def close(self):
+        self.pool.shutdown()
+        for connection in self.connections:
+            connection.close()
+
+
+def queue_depth():
+    """Число писем по статусам и возраст самого старого ожидающего."""
+    rows = QueuedEmail.objects.order_by().values('status').annotate(
+        total=Count('id'), oldest=Min('created_at')
+    )
+    depth = {QueuedEmail.PENDING: 0, QueuedEmail.FAILED: 0}
+    oldest = None
+    for row in rows:
+        depth[row['status']] = row['total']
+        if row['status'] == QueuedEmail.PENDING:
+            oldest = row['oldest']
+    age = (timezone.now() - oldest).total_seconds() if oldest else 0
+    return depth, age
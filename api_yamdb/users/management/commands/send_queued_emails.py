@@ -0,0 +1,47 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from users.mail import Dispatcher
+
+
+class Command(BaseCommand):
+    """Команда менеджера для отправки писем из очереди."""
+
+    help = 'Send queued emails with a pool of worker threads'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=settings.EMAIL_QUEUE_WORKERS
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=settings.EMAIL_QUEUE_BATCH_SIZE
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить письма, срок которых подошёл, и завершиться.'
+        )
+
+    def handle(self, *args, **options):
+        dispatcher = Dispatcher(options['workers'])
+        totals = [0, 0, 0]
+        try:
+            while True:
+                counts = dispatcher.run_once(options['batch_size'])
+                totals = [
+                    total + count for total, count in zip(totals, counts)
+                ]
+                if not any(counts):
+                    if options['once']:
+                        break
+                    time.sleep(settings.EMAIL_QUEUE_POLL_INTERVAL)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            dispatcher.close()
+            sent, retried, failed = totals
+            self.stdout.write(self.style.SUCCESS(
+                f'Отправлено: {sent}, отложено: {retried}, '
+                f'не отправлено: {failed}'
+            ))
@@ -1,7 +1,13 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.utils import timezone
 
 from api_yamdb.constants import ADMIN, AUTHENTICATED_USER, MODERATOR
+from users.signup import loaded_identity
+from users.tokens import forget_token_version
+
+# Поля, которые попадают в токен: их смена отзывает выданные токены.
+TOKEN_CLAIM_FIELDS = ('username', 'role', 'is_superuser', 'is_active')
 
 
 class User(AbstractUser):
@@ -22,6 +28,10 @@ class User(AbstractUser):
         blank=True,
         verbose_name='О себе'
     )
+    token_version = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Версия токенов'
+    )
 
     @property
     def is_moderator(self):
@@ -31,8 +41,89 @@ class User(AbstractUser):
     def is_admin(self):
         return self.is_superuser or self.role == ADMIN
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_username = instance.__dict__.get('username')
+        instance._loaded_claims = instance.loaded_claims()
+        instance._loaded_identity = loaded_identity(instance)
+        return instance
+
+    def loaded_claims(self):
+        """Загруженные (не отложенные) поля токена."""
+        return {
+            field: self.__dict__[field]
+            for field in TOKEN_CLAIM_FIELDS if field in self.__dict__
+        }
+
+    def claims_changed(self):
+        """Изменились ли поля токена с момента загрузки."""
+        return any(
+            self.__dict__.get(field, value) != value
+            for field, value in getattr(self, '_loaded_claims', {}).items()
+        )
+
+    def revoke_tokens(self):
+        """Отзываем все выданные пользователю токены."""
+        self.token_version += 1
+        self.save(update_fields=['token_version'])
+
+    def save(self, *args, **kwargs):
+        """Смена полей токена увеличивает версию токенов."""
+        changed = self.claims_changed()
+        update_fields = kwargs.get('update_fields')
+        if changed:
+            self.token_version += 1
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._loaded_claims = self.loaded_claims()
+        if changed or (
+            update_fields is not None and 'token_version' in update_fields
+        ):
+            forget_token_version(self.pk)
+
     class Meta:
         ordering = ['id']
 
     def __str__(self):
         return self.username
+
+
+class QueuedEmail(models.Model):
+    """Письмо в очереди на отправку; после отправки строка удаляется."""
+
+    PENDING = 'pending'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Ожидает отправки'),
+        (FAILED, 'Не отправлено'),
+    ]
+    subject = models.CharField(max_length=255, verbose_name='Тема')
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.EmailField(verbose_name='Отправитель')
+    to = models.EmailField(verbose_name='Получатель')
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name='Следующая попытка'
+    )
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['next_attempt_at', 'id']
+        indexes = [
+            models.Index(
+                fields=['status', 'next_attempt_at', 'id'],
+                name='queuedemail_due_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
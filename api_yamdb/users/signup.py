@@ -0,0 +1,52 @@
+"""Склейка повторных регистраций.
+
+Первая регистрация пары username/email занимает ключ в кэше Django на
+`SIGNUP_COALESCE_WINDOW` секунд. Повторы в этом окне отвечают как обычно,
+но не выдают новый код, не пишут в базу и не ставят письмо в очередь:
+действует код из уже отправленного письма, он хранится только в базе.
+Ключ сбрасывается при ошибке регистрации, удалении пользователя и смене
+его username или email.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+KEY_PREFIX = 'signup'
+
+
+def signup_key(username, email):
+    digest = hashlib.md5(f'{username}\0{email}'.encode()).hexdigest()
+    return f'{KEY_PREFIX}:{digest}'
+
+
+def claim_signup(username, email):
+    """Занимаем окно; False, если регистрация пары в нём уже была."""
+    return cache.add(
+        signup_key(username, email), True,
+        settings.SIGNUP_COALESCE_WINDOW
+    )
+
+
+def forget_signup(username, email):
+    cache.delete(signup_key(username, email))
+
+
+def loaded_identity(user):
+    return user.__dict__.get('username'), user.__dict__.get('email')
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def forget_renamed_signup(sender, instance, created, **kwargs):
+    loaded = getattr(instance, '_loaded_identity', None)
+    current = loaded_identity(instance)
+    if not created and loaded and None not in loaded and loaded != current:
+        forget_signup(*loaded)
+    instance._loaded_identity = current
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_deleted_signup(sender, instance, **kwargs):
+    forget_signup(*loaded_identity(instance))
@@ -0,0 +1,61 @@
+"""Текущие версии токенов пользователей.
+
+В токен записывается версия `User.token_version` на момент выдачи;
+токен действителен, пока она совпадает с текущей. Текущая версия
+читается из кэша Django и лишь при промахе из базы, поэтому проверка
+токена обычно обходится без SQL. Кэш общий для всех процессов (см.
+`reviews.versions.check_shared_cache`), поэтому смена версии и удаление
+пользователя отзывают токены сразу во всех процессах. Запись живёт не
+дольше `TOKEN_VERSION_CACHE_TIMEOUT` секунд: это предел для записей в
+базу мимо модели (`QuerySet.update`).
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+KEY_PREFIX = 'token-version'
+# Версия удалённого пользователя: не совпадает ни с одной выданной.
+DELETED = -1
+
+
+def token_version_key(user_id):
+    return f'{KEY_PREFIX}:{user_id}'
+
+
+def load_token_version(user_id):
+    version = get_user_model()._default_manager.filter(
+        pk=user_id
+    ).values_list('token_version', flat=True).first()
+    return DELETED if version is None else version
+
+
+def current_token_version(user_id):
+    """Версия токенов пользователя или None, если его нет."""
+    key = token_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = load_token_version(user_id)
+        cache.add(key, version, settings.TOKEN_VERSION_CACHE_TIMEOUT)
+    return None if version == DELETED else version
+
+
+def forget_token_version(user_id):
+    """Сбрасываем версию сразу, после коммита кладём в кэш новую.
+
+    Запись после коммита перекрывает старую версию, которую параллельный
+    запрос мог прочитать из базы до коммита и положить в кэш после сброса.
+    """
+    key = token_version_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.set(
+        key, load_token_version(user_id),
+        settings.TOKEN_VERSION_CACHE_TIMEOUT
+    ))
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def forget_deleted_user(sender, instance, **kwargs):
+    forget_token_version(instance.pk)
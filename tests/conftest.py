@@ -1,6 +1,7 @@
 import os
 import sys
 
+import pytest
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +34,30 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budget(settings):
+    settings.QUERY_BUDGET_RAISE = True
+
+
+@pytest.fixture(autouse=True)
+def check_reference_snapshots(settings):
+    settings.REFERENCE_SNAPSHOT_CHECK_INTERVAL = 0
+
+
+@pytest.fixture(autouse=True)
+def check_user_cache(settings):
+    settings.USER_CACHE_CHECK_INTERVAL = 0
+
+
+@pytest.fixture(autouse=True)
+def send_emails_on_commit(settings):
+    # Письма уходят сразу после коммита, без воркера очереди.
+    settings.EMAIL_QUEUE_EAGER = True
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    from django.core.cache import cache
+    cache.clear()
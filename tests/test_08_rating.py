@@ -0,0 +1,121 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08RatingAggregates:
+
+    TITLE_DETAIL_URL_TEMPLATE = '/api/v1/titles/{title_id}/'
+    REVIEW_DETAIL_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/'
+    )
+
+    def get_rating(self, client, title_id):
+        response = client.get(
+            self.TITLE_DETAIL_URL_TEMPLATE.format(title_id=title_id)
+        )
+        assert response.status_code == HTTPStatus.OK
+        return response.json().get('rating')
+
+    def test_01_rating_follows_reviews(self, client, admin_client,
+                                       user_client, moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        assert self.get_rating(client, title_id) is None
+
+        review = create_single_review(user_client, title_id, 'Хорошо', 8)
+        create_single_review(moderator_client, title_id, 'Так себе', 3)
+        assert self.get_rating(client, title_id) == 6, (
+            'Рейтинг произведения должен обновляться при добавлении отзыва.'
+        )
+
+        response = user_client.patch(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=review.json()['id']
+            ),
+            data={'score': 1}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_rating(client, title_id) == 2, (
+            'Рейтинг произведения должен обновляться при изменении оценки.'
+        )
+
+        response = user_client.delete(
+            self.REVIEW_DETAIL_URL_TEMPLATE.format(
+                title_id=title_id, review_id=review.json()['id']
+            )
+        )
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(client, title_id) == 3, (
+            'Рейтинг произведения должен обновляться при удалении отзыва.'
+        )
+
+    def test_02_rating_after_author_cascade(self, client, admin_client,
+                                            user_client, moderator_client,
+                                            moderator):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Отлично', 10)
+        create_single_review(moderator_client, title_id, 'Плохо', 2)
+
+        response = admin_client.delete(f'/api/v1/users/{moderator.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_rating(client, title_id) == 10, (
+            'При каскадном удалении отзывов вместе с автором рейтинг '
+            'произведения должен пересчитываться.'
+        )
+
+    def test_03_recalculate_scores(self, client, admin_client, user_client):
+        from reviews.models import Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Отлично', 9)
+        Title.objects.update(score_sum=0, score_count=0, rating=None)
+
+        Title.recalculate_scores()
+        title = Title.objects.get(pk=title_id)
+        assert (title.score_sum, title.score_count, title.rating) == (
+            9, 1, 9
+        )
+
+    def test_04_update_without_loaded_score(self, admin_client, user_client,
+                                            moderator_client):
+        from reviews.models import Review, Title
+
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'Отлично', 10)
+        review_id = create_single_review(
+            moderator_client, title_id, 'Хорошо', 8
+        ).json()['id']
+
+        def scores():
+            title = Title.objects.get(pk=title_id)
+            return title.score_sum, title.score_count, title.rating
+
+        Review.objects.only('text', 'title').get(pk=review_id).save()
+        assert scores() == (18, 2, 9), (
+            'Проверьте, что сохранение отзыва без загруженной оценки не '
+            'считает его новым.'
+        )
+        review = Review.objects.get(pk=review_id)
+        Review(
+            pk=review.pk, title_id=title_id, author_id=review.author_id,
+            text='Заново', score=6, pub_date=review.pub_date
+        ).save()
+        assert scores() == (16, 2, 8)
+
+        stale = Review.objects.get(pk=review_id)
+        # Параллельный запрос успел изменить оценку того же отзыва.
+        other = Review.objects.get(pk=review_id)
+        other.score = 2
+        other.save()
+        stale.score = 4
+        stale.save()
+        assert scores() == (14, 2, 7), (
+            'Проверьте, что разница оценок считается от значения в базе.'
+        )
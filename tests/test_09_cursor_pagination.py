@@ -0,0 +1,80 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_reviews, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09CursorPagination:
+
+    TITLES_URL = '/api/v1/titles/'
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+
+    def collect_pages(self, client, url):
+        results = []
+        while url:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data, (
+                'Курсорная пагинация не должна считать общее число объектов.'
+            )
+            results.extend(data['results'])
+            url = data['next']
+        return results
+
+    def test_01_titles_cursor_mode(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        for year in range(1990, 1996):
+            admin_client.post(self.TITLES_URL, data={
+                'name': f'Фильм {year}',
+                'year': year,
+                'genre': [titles[0]['genre'][0]],
+                'category': titles[0]['category'],
+            })
+
+        response = client.get(self.TITLES_URL)
+        assert response.json()['count'] == 8, (
+            'По умолчанию должна сохраняться постраничная пагинация.'
+        )
+
+        results = self.collect_pages(
+            client, f'{self.TITLES_URL}?pagination=cursor'
+        )
+        ids = [title['id'] for title in results]
+        assert len(ids) == 8
+        assert ids == sorted(ids)
+
+    def test_02_reviews_cursor_mode(self, client, admin_client, admin,
+                                    user_client, user, moderator_client,
+                                    moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        reviews, titles = create_reviews(admin_client, author_map)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        results = self.collect_pages(client, f'{url}?pagination=cursor')
+        assert [review['id'] for review in results] == [
+            review['id'] for review in reviews
+        ]
+
+    def test_03_cursor_rejects_other_ordering(self, client, admin_client):
+        create_titles(admin_client)
+        for query in ('ordering=-rating', 'ordering=name',
+                      'search=терминат'):
+            response = client.get(
+                f'{self.TITLES_URL}?{query}&pagination=cursor'
+            )
+            assert response.status_code == HTTPStatus.BAD_REQUEST, (
+                'Проверьте, что курсорная пагинация не подменяет молча '
+                f'сортировку запроса `{query}`.'
+            )
+            response = client.get(f'{self.TITLES_URL}?{query}')
+            assert response.status_code == HTTPStatus.OK
+        results = self.collect_pages(
+            client, f'{self.TITLES_URL}?year=1984&pagination=cursor'
+        )
+        assert [title['year'] for title in results] == [1984]
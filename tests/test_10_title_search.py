@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10TitleSearch:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def search(self, client, text):
+        response = client.get(self.TITLES_URL, {'search': text})
+        assert response.status_code == HTTPStatus.OK
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_search_by_name_description_and_genre(self, client,
+                                                     admin_client):
+        titles, _, genres = create_titles(admin_client)
+
+        assert self.search(client, 'терминат') == [titles[0]['name']], (
+            'Поиск должен находить произведение по началу слова в названии.'
+        )
+        assert self.search(client, 'yippie') == [titles[1]['name']], (
+            'Поиск должен находить произведение по описанию.'
+        )
+        assert self.search(client, 'драма') == [titles[1]['name']], (
+            'Поиск должен находить произведение по названию жанра.'
+        )
+        assert self.search(client, 'несуществующее') == []
+
+    def test_02_index_follows_changes(self, client, admin_client):
+        titles, _, genres = create_titles(admin_client)
+        response = admin_client.patch(
+            f'{self.TITLES_URL}{titles[0]["id"]}/',
+            data={'name': 'Хищник'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.search(client, 'хищник') == ['Хищник']
+        assert self.search(client, 'терминатор') == []
+
+        admin_client.delete(f'/api/v1/genres/{genres[2]["slug"]}/')
+        assert self.search(client, 'драма') == [], (
+            'После удаления жанра индекс произведений должен обновиться.'
+        )
+
+        admin_client.delete(f'{self.TITLES_URL}{titles[1]["id"]}/')
+        assert self.search(client, 'орешек') == []
+
+    def test_03_migrate_fills_new_index(self, client, admin_client):
+        from django.core.management import call_command
+        from django.db import connection
+
+        from reviews.search import SEARCH_TABLE
+
+        titles, _, _ = create_titles(admin_client)
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE {SEARCH_TABLE}')
+        call_command('migrate', verbosity=0)
+        assert self.search(client, 'терминат') == [titles[0]['name']], (
+            'Проверьте, что индекс, созданный после миграций на базе с '
+            'произведениями, заполняется.'
+        )
@@ -0,0 +1,47 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11QueryBudget:
+
+    def test_01_list_endpoints_within_budget(self, client, admin_client,
+                                             admin, user_client, user,
+                                             moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        create_single_review(user_client, titles[1]['id'], 'Хорошо', 7)
+        urls = (
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+            '/api/v1/titles/',
+            f'/api/v1/titles/{titles[0]["id"]}/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/{reviews[0]["id"]}/',
+            (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+             f'{reviews[0]["id"]}/comments/'),
+            '/api/v1/users/',
+            f'/api/v1/users/{user.username}/',
+        )
+        for url in urls:
+            response = admin_client.get(url)
+            assert response.status_code == HTTPStatus.OK, url
+
+    def test_02_budget_violation_raises(self, client, admin_client):
+        from api.query_budget import QueryBudgetExceeded
+        from api.views import TitleViewSet
+
+        budget = TitleViewSet.query_budget
+        TitleViewSet.query_budget = {'list': 0}
+        try:
+            with pytest.raises(QueryBudgetExceeded):
+                client.get('/api/v1/titles/')
+        finally:
+            TitleViewSet.query_budget = budget
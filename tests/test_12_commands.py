@@ -0,0 +1,166 @@
+import json
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from reviews.models import Category, Genre
+
+
+def write_csv(path, header, rows):
+    lines = [','.join(header)] + [','.join(map(str, row)) for row in rows]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12Commands:
+
+    def prepare_data(self, tmp_path):
+        write_csv(
+            tmp_path / 'category.csv', ('id', 'name', 'slug'),
+            [(i, f'Категория {i}', f'category-{i}') for i in range(1, 8)]
+        )
+        write_csv(
+            tmp_path / 'genre.csv', ('id', 'name', 'slug'),
+            [(i, f'Жанр {i}', f'genre-{i}') for i in range(1, 4)]
+        )
+        return tmp_path
+
+    def test_01_import_selected_tables_in_batches(self, tmp_path):
+        data_dir = self.prepare_data(tmp_path)
+        call_command(
+            'import_from_CSV', data_dir=str(data_dir),
+            tables=['category', 'genre'], batch_size=2, commit_every=1
+        )
+        assert Category.objects.count() == 7
+        assert Genre.objects.count() == 3
+        assert not (data_dir / '.import_checkpoint.json').exists(), (
+            'После успешного импорта контрольная точка должна удаляться.'
+        )
+
+    def test_02_resume_skips_committed_rows(self, tmp_path):
+        data_dir = self.prepare_data(tmp_path)
+        for i in range(1, 5):
+            Category.objects.create(
+                id=i, name=f'Категория {i}', slug=f'category-{i}'
+            )
+        (data_dir / '.import_checkpoint.json').write_text(
+            json.dumps({'category': 4}), encoding='utf-8'
+        )
+        call_command(
+            'import_from_CSV', data_dir=str(data_dir),
+            tables=['category'], resume=True
+        )
+        assert Category.objects.count() == 7
+
+    def test_03_upsert_inserts_and_updates(self, tmp_path, capsys):
+        data_dir = self.prepare_data(tmp_path)
+        call_command(
+            'import_from_CSV', data_dir=str(data_dir), tables=['genre']
+        )
+        write_csv(
+            data_dir / 'genre.csv', ('id', 'name', 'slug'),
+            [(1, 'Жанр 1', 'genre-1'), (2, 'Новое имя', 'genre-2'),
+             (4, 'Жанр 4', 'genre-4')]
+        )
+        call_command(
+            'import_from_CSV', data_dir=str(data_dir), tables=['genre'],
+            upsert=True
+        )
+        assert Genre.objects.count() == 4
+        assert Genre.objects.get(pk=2).name == 'Новое имя'
+        assert (
+            'вставлено 1, обновлено 1, без изменений 1'
+            in capsys.readouterr().out
+        )
+
+    def test_04_dependency_order(self):
+        from reviews.management.commands.import_from_CSV import (
+            IMPORT_CSV_FILES, dependency_order
+        )
+        from reviews.models import Comment, Review, Title
+
+        ordered = dependency_order(reversed(list(IMPORT_CSV_FILES)))
+        assert ordered.index(Category) < ordered.index(Title)
+        assert ordered.index(Title) < ordered.index(Review)
+        assert ordered.index(Review) < ordered.index(Comment)
+
+    def test_05_parallel_parsing(self, tmp_path):
+        data_dir = self.prepare_data(tmp_path)
+        write_csv(
+            data_dir / 'titles.csv', ('id', 'name', 'year', 'category_id'),
+            [(i, f'Произведение {i}', 2000 + i, i % 7 + 1)
+             for i in range(1, 20)]
+        )
+        call_command(
+            'import_from_CSV', data_dir=str(data_dir),
+            tables=['title', 'category', 'genre'], batch_size=4, workers=2
+        )
+        assert Category.objects.count() == 7
+        assert Genre.objects.count() == 3
+        assert Category.objects.get(pk=3).titles.count() == 3
+
+    def test_06_generated_dataset_imports(self, tmp_path):
+        from reviews.models import Review, Title
+
+        call_command(
+            'generate_csv_data', output_dir=str(tmp_path), seed=1,
+            users=20, categories=3, genres=5, titles=30, reviews=200,
+            comments=50
+        )
+        call_command('import_from_CSV', data_dir=str(tmp_path))
+        assert Title.objects.count() == 30
+        assert Review.objects.exists()
+        popular = Title.objects.order_by('-score_count').first()
+        assert popular.score_count > Review.objects.count() / 30, (
+            'Популярность произведений должна быть неравномерной.'
+        )
+
+    def test_07_benchmark_baseline_and_compare(self, tmp_path):
+        data_dir = tmp_path / 'data'
+        call_command(
+            'generate_csv_data', output_dir=str(data_dir), seed=1,
+            users=20, categories=3, genres=5, titles=30, reviews=200,
+            comments=50
+        )
+        call_command('import_from_CSV', data_dir=str(data_dir))
+        baseline = tmp_path / 'baseline.json'
+        call_command(
+            'benchmark_api', iterations=2, output=str(baseline)
+        )
+        results = json.loads(baseline.read_text(encoding='utf-8'))
+        assert {
+            'titles-list', 'titles-list?year_min', 'titles-list?year_max',
+            'titles-list?genre_match', 'reviews-list', 'metrics', 'signup'
+        } <= set(results)
+        assert set(results['titles-list']) == {
+            'p50_ms', 'p95_ms', 'p99_ms', 'queries', 'bytes'
+        }
+
+        results['titles-list']['queries'] = 0
+        baseline.write_text(json.dumps(results), encoding='utf-8')
+        with pytest.raises(CommandError, match='titles-list'):
+            call_command(
+                'benchmark_api', iterations=2, compare=str(baseline)
+            )
+
+    def test_08_upsert_after_import_changes_nothing(self, capsys):
+        from reviews.models import Comment, Review
+
+        call_command('import_from_CSV')
+        pub_dates = dict(Review.objects.values_list('id', 'pub_date'))
+        capsys.readouterr()
+        call_command('import_from_CSV', upsert=True)
+        reports = [
+            line for line in capsys.readouterr().out.splitlines()
+            if 'обновлено' in line
+        ]
+        assert len(reports) == 7
+        assert all('обновлено 0,' in line for line in reports), (
+            'Проверьте, что повторный импорт с `--upsert` не находит '
+            'изменений: даты публикации берутся из CSV.'
+        )
+        assert dict(Review.objects.values_list('id', 'pub_date')) == (
+            pub_dates
+        )
+        assert Comment.objects.exists()
@@ -0,0 +1,49 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13Metrics:
+
+    METRICS_URL = '/api/v1/metrics'
+
+    def test_01_metrics_admin_only(self, client, user_client):
+        assert client.get(self.METRICS_URL).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        assert user_client.get(self.METRICS_URL).status_code == (
+            HTTPStatus.FORBIDDEN
+        )
+
+    def test_02_metrics_by_route(self, client, admin_client):
+        from api.metrics import registry
+
+        titles, _, _ = create_titles(admin_client)
+        registry.reset()
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        client.get(f'/api/v1/titles/{titles[0]["id"]}/')
+        client.get('/api/v1/titles/999999/')
+
+        response = admin_client.get(self.METRICS_URL)
+        assert response.status_code == HTTPStatus.OK
+        assert response['Content-Type'].startswith('text/plain')
+        body = response.content.decode()
+        assert (
+            'yamdb_http_requests_total{route="titles-list",status="200"} 2'
+            in body
+        )
+        assert (
+            'yamdb_http_requests_total{route="titles-detail",status="404"} 1'
+            in body
+        )
+        assert (
+            'yamdb_http_request_duration_seconds_count'
+            '{route="titles-list"} 2' in body
+        )
+        assert 'yamdb_sql_queries_per_request_bucket{route="titles-list"' in (
+            body
+        )
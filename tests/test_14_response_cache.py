@@ -0,0 +1,73 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14ResponseCache:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def get(self, client, url, **params):
+        response = client.get(url, params)
+        assert response.status_code == HTTPStatus.OK
+        return response
+
+    def test_01_hit_after_miss(self, client, admin_client):
+        create_titles(admin_client)
+        first = self.get(client, self.TITLES_URL, year=1984, name='Т')
+        second = self.get(client, self.TITLES_URL, name='Т', year=1984)
+        assert first['X-Cache'] == 'MISS'
+        assert second['X-Cache'] == 'HIT', (
+            'Повторный запрос с теми же параметрами в другом порядке '
+            'должен обслуживаться из кэша.'
+        )
+        assert first.json() == second.json()
+
+    def test_02_invalidation_on_related_writes(self, client, admin_client,
+                                               user_client):
+        titles, categories, genres = create_titles(admin_client)
+        detail_url = f'{self.TITLES_URL}{titles[0]["id"]}/'
+        self.get(client, detail_url)
+        assert self.get(client, detail_url)['X-Cache'] == 'HIT'
+
+        create_single_review(user_client, titles[0]['id'], 'Отлично', 9)
+        response = self.get(client, detail_url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 9
+
+        admin_client.patch(detail_url, data={'genre': [genres[2]['slug']]})
+        response = self.get(client, detail_url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['genre'] == [genres[2]]
+
+        self.get(client, '/api/v1/categories/')
+        admin_client.delete(f'/api/v1/categories/{categories[1]["slug"]}/')
+        response = self.get(client, '/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] == 1
+
+    def test_03_cache_does_not_skip_authentication(self, client,
+                                                   admin_client):
+        create_titles(admin_client)
+        self.get(client, self.TITLES_URL)
+        response = client.get(
+            self.TITLES_URL, HTTP_AUTHORIZATION='Bearer invalid'
+        )
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    def test_04_shared_cache_required(self, settings, tmp_path):
+        from reviews.versions import check_shared_cache
+
+        check_shared_cache()
+        settings.WEB_CONCURRENCY = 2
+        with pytest.raises(ImproperlyConfigured):
+            check_shared_cache()
+        settings.CACHES = {'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': str(tmp_path),
+        }}
+        check_shared_cache()
@@ -0,0 +1,180 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+
+from tests.utils import create_comments, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15ConditionalGet:
+
+    REVIEWS_URL_TEMPLATE = '/api/v1/titles/{title_id}/reviews/'
+    COMMENTS_URL_TEMPLATE = (
+        '/api/v1/titles/{title_id}/reviews/{review_id}/comments/'
+    )
+
+    def test_01_etag_not_modified(self, client, admin_client, admin,
+                                  user_client, user, moderator_client,
+                                  moderator, django_assert_num_queries):
+        author_map = {admin: admin_client, user: user_client}
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+
+        response = client.get(url)
+        etag = response['ETag']
+        assert etag
+        # Произведение и последняя дата отзыва, без выборки страницы.
+        with django_assert_num_queries(2):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+        assert response['ETag'] == etag
+        assert not response.content
+
+        assert client.get(
+            f'{url}?pagination=cursor', HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK, 'ETag должен зависеть от параметров.'
+
+        create_single_review(moderator_client, titles[0]['id'], 'Да', 3)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response['ETag'] != etag
+
+    def test_02_comment_edit_changes_etag(self, client, admin_client, admin,
+                                          user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        )
+        etag = client.get(url)['ETag']
+        user_client.patch(f'{url}{comments[1]["id"]}/', data={'text': 'Да'})
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert 'Да' in [comment['text'] for comment in response.json()[
+            'results'
+        ]]
+
+    def age_versions(self, title_id):
+        """Версии отзывов произведения и авторов изменены минуту назад."""
+        from reviews.models import Review, User
+        from reviews.versions import current_versions, modified_key
+
+        current_versions((Review,), title_id)
+        current_versions((User,))
+        cache.set(
+            modified_key(Review, title_id), time.time() - 60, timeout=None
+        )
+        cache.set(modified_key(User), time.time() - 60, timeout=None)
+
+    def test_03_if_modified_since(self, client, admin_client, admin,
+                                  user_client, user, moderator_client,
+                                  moderator):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_comments(admin_client, author_map)[1:]
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        self.age_versions(titles[0]['id'])
+
+        response = client.get(url)
+        last_modified = response['Last-Modified']
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+        create_single_review(
+            moderator_client, titles[0]['id'], 'Ещё отзыв', 5
+        )
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.OK
+        assert 'Last-Modified' not in response, (
+            'Last-Modified не отдаётся в секунду последнего изменения.'
+        )
+
+    def test_04_expired_version_changes_validators(self, client,
+                                                   admin_client, admin,
+                                                   user_client, user):
+        from reviews.models import Review, User
+        from reviews.versions import version_key
+
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_comments(admin_client, author_map)[1:]
+        url = self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id'])
+        self.age_versions(titles[0]['id'])
+        response = client.get(url)
+        etag, last_modified = response['ETag'], response['Last-Modified']
+
+        # Запись мимо сигналов (другой процесс) и истечение версий.
+        Review.objects.filter(title_id=titles[0]['id']).update(text='Иначе')
+        cache.delete_many([
+            version_key(Review, titles[0]['id']), version_key(User)
+        ])
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после истечения версий ETag меняется.'
+        )
+        assert response.json()['results'][0]['text'] == 'Иначе'
+        response = client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после истечения версий меняется Last-Modified.'
+        )
+
+    def test_05_validators_per_parent(self, client, admin_client, admin,
+                                      user_client, user):
+        from reviews.models import Comment, Review
+
+        author_map = {admin: admin_client, user: user_client}
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        reviews_url = self.REVIEWS_URL_TEMPLATE.format(
+            title_id=titles[0]['id']
+        )
+        comments_url = self.COMMENTS_URL_TEMPLATE.format(
+            title_id=titles[0]['id'], review_id=reviews[0]['id']
+        )
+        review_etag = client.get(reviews_url)['ETag']
+        comment_etag = client.get(comments_url)['ETag']
+
+        review = create_single_review(
+            admin_client, titles[1]['id'], 'Другое произведение', 5
+        ).json()
+        admin_client.post(
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{review["id"]}/'
+            'comments/', data={'text': 'Другой отзыв'}
+        )
+        assert client.get(
+            reviews_url, HTTP_IF_NONE_MATCH=review_etag
+        ).status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что отзыв к другому произведению не меняет ETag '
+            'списка отзывов.'
+        )
+        assert client.get(
+            comments_url, HTTP_IF_NONE_MATCH=comment_etag
+        ).status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что комментарий к другому отзыву не меняет ETag '
+            'списка комментариев.'
+        )
+
+        # Вставка мимо сигналов (другой процесс).
+        Comment.objects.bulk_create([Comment(
+            review_id=reviews[0]['id'], author=user, text='Мимо сигналов'
+        )])
+        assert client.get(
+            comments_url, HTTP_IF_NONE_MATCH=comment_etag
+        ).status_code == HTTPStatus.OK
+        Review.objects.filter(pk=reviews[0]['id']).delete()
+        assert client.get(
+            reviews_url, HTTP_IF_NONE_MATCH=review_etag
+        ).status_code == HTTPStatus.OK
+
+    def test_06_head_not_modified(self, client, admin_client, admin,
+                                  user_client, user):
+        author_map = {admin: admin_client, user: user_client}
+        _, titles = create_comments(admin_client, author_map)[1:]
+        for url in (
+            self.REVIEWS_URL_TEMPLATE.format(title_id=titles[0]['id']),
+            '/api/v1/titles/',
+        ):
+            etag = client.head(url)['ETag']
+            response = client.head(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                'Проверьте, что HEAD-запрос с совпадающим ETag получает 304.'
+            )
@@ -0,0 +1,93 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16TitleReadModel:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_rows_follow_writes(self, client, admin_client, user_client):
+        from reviews.models import TitleReadModel
+
+        titles, categories, genres = create_titles(admin_client)
+        title_id = titles[0]['id']
+        fragment = json.loads(
+            TitleReadModel.objects.get(title_id=title_id).json
+        )
+        assert sorted(genre['slug'] for genre in fragment['genre']) == [
+            'comedy', 'horror'
+        ]
+        assert fragment['category']['slug'] == categories[0]['slug']
+
+        create_single_review(user_client, title_id, 'Хорошо', 7)
+        admin_client.patch(
+            f'/api/v1/titles/{title_id}/', data={'genre': ['drama']}
+        )
+        admin_client.delete(f'/api/v1/categories/{categories[0]["slug"]}/')
+
+        row = TitleReadModel.objects.get(title_id=title_id)
+        fragment = json.loads(row.json)
+        assert fragment['rating'] == 7
+        assert [genre['slug'] for genre in fragment['genre']] == ['drama']
+        assert fragment['category'] is None
+
+        response = client.get(self.TITLES_URL)
+        assert response.status_code == HTTPStatus.OK
+        results = response.json()['results']
+        assert results[0] == json.loads(row.json)
+        assert results[0]['category'] is None
+        assert response.json()['count'] == 2
+
+        admin_client.delete(f'/api/v1/titles/{title_id}/')
+        assert not TitleReadModel.objects.filter(title_id=title_id).exists()
+
+    def test_02_check_and_fix(self, admin_client):
+        from reviews.models import TitleReadModel
+
+        titles, _, _ = create_titles(admin_client)
+        call_command('rebuild_title_read_model', check=True)
+
+        TitleReadModel.objects.filter(title_id=titles[0]['id']).update(
+            json='{}'
+        )
+        TitleReadModel.objects.filter(title_id=titles[1]['id']).delete()
+        with pytest.raises(CommandError):
+            call_command('rebuild_title_read_model', check=True)
+        call_command('rebuild_title_read_model', check=True, fix=True)
+        call_command('rebuild_title_read_model', check=True)
+
+    def test_03_retrieve_invalid_id(self, client):
+        for title_id in ('abc', '999'):
+            response = client.get(f'{self.TITLES_URL}{title_id}/')
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                'Проверьте, что запрос несуществующего произведения '
+                'возвращает 404.'
+            )
+
+    def test_04_version_bumped_after_refresh(self, client, admin_client,
+                                             monkeypatch):
+        from api import read_model
+
+        titles, _, _ = create_titles(admin_client)
+        url = f'{self.TITLES_URL}{titles[0]["id"]}/'
+        refresh = read_model.refresh_titles
+
+        def read_before_refresh(title_ids):
+            # Чтение между сдвигом версий в reviews.signals и записью строк.
+            client.get(url)
+            refresh(title_ids)
+
+        monkeypatch.setattr(read_model, 'refresh_titles', read_before_refresh)
+        admin_client.patch(url, data={'name': 'Новое название'})
+        monkeypatch.undo()
+        assert client.get(url).json()['name'] == 'Новое название', (
+            'Проверьте, что версия произведений сдвигается после обновления '
+            'представления для чтения.'
+        )
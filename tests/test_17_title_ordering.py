@@ -0,0 +1,37 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17TitleOrdering:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def names(self, client, ordering):
+        response = client.get(self.TITLES_URL, {'ordering': ordering})
+        assert response.status_code == HTTPStatus.OK
+        return [title['name'] for title in response.json()['results']]
+
+    def test_01_ordering(self, client, admin_client, user_client,
+                         moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        terminator, die_hard = titles[0]['name'], titles[1]['name']
+        create_single_review(user_client, titles[0]['id'], 'Так себе', 4)
+        create_single_review(moderator_client, titles[0]['id'], 'Ну', 5)
+        create_single_review(user_client, titles[1]['id'], 'Шедевр', 9)
+
+        assert self.names(client, '-rating') == [die_hard, terminator]
+        assert self.names(client, 'rating') == [terminator, die_hard]
+        assert self.names(client, '-year') == [die_hard, terminator]
+        assert self.names(client, 'year') == [terminator, die_hard]
+        assert self.names(client, 'name') == [die_hard, terminator]
+        assert self.names(client, '-reviews_count') == [
+            terminator, die_hard
+        ]
+
+    def test_02_unknown_ordering_rejected(self, client):
+        response = client.get(self.TITLES_URL, {'ordering': 'description'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
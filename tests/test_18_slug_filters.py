@@ -0,0 +1,58 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18SlugFilters:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def names(self, client, **params):
+        response = client.get(self.TITLES_URL, params)
+        assert response.status_code == HTTPStatus.OK
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def test_01_exact_and_multiple_slugs(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        terminator, die_hard = titles[0]['name'], titles[1]['name']
+
+        assert self.names(client, category='films') == [terminator], (
+            'Проверьте, что фильтр `category` ищет точное совпадение slug.'
+        )
+        assert self.names(client, category='film') == [], (
+            'Проверьте, что фильтр `category` не ищет по подстроке.'
+        )
+        assert self.names(client, category='films,books') == sorted(
+            [terminator, die_hard]
+        )
+        assert self.names(client, genre='horror,comedy') == [terminator], (
+            'Проверьте, что произведение с несколькими подходящими жанрами '
+            'попадает в выдачу один раз.'
+        )
+        assert self.names(client, genre='comedy,drama') == sorted(
+            [terminator, die_hard]
+        )
+        assert self.names(client, genre='drama,unknown') == [die_hard]
+
+    def test_02_all_genres(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        terminator = titles[0]['name']
+
+        assert self.names(
+            client, genre='horror,comedy', genre_match='all'
+        ) == [terminator]
+        assert self.names(
+            client, genre='comedy,drama', genre_match='all'
+        ) == []
+        assert self.names(
+            client, genre='horror,unknown', genre_match='all'
+        ) == []
+
+    def test_03_invalid_match_rejected(self, client):
+        response = client.get(
+            self.TITLES_URL, {'genre': 'drama', 'genre_match': 'some'}
+        )
+        assert response.status_code == HTTPStatus.BAD_REQUEST
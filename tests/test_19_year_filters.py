@@ -0,0 +1,44 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19YearFilters:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def names(self, client, **params):
+        response = client.get(self.TITLES_URL, params)
+        assert response.status_code == HTTPStatus.OK
+        return sorted(title['name'] for title in response.json()['results'])
+
+    def test_01_year_filters(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        terminator, die_hard = titles[0]['name'], titles[1]['name']
+
+        assert self.names(client, year=1984) == [terminator]
+        assert self.names(client, year=198) == [], (
+            'Проверьте, что фильтр `year` ищет точное совпадение года.'
+        )
+        assert self.names(client, year_min=1985) == [die_hard]
+        assert self.names(client, year_max=1985) == [terminator]
+        assert self.names(client, year_min=1980, year_max=1990) == sorted(
+            [terminator, die_hard]
+        )
+        assert self.names(client, decade=1980) == sorted(
+            [terminator, die_hard]
+        )
+        assert self.names(client, decade=1985) == sorted(
+            [terminator, die_hard]
+        ), 'Проверьте, что `decade` округляет год до начала десятилетия.'
+        assert self.names(client, decade=1990) == []
+        assert self.names(client, decade=1980, category='books') == [
+            die_hard
+        ]
+
+    def test_02_invalid_year_rejected(self, client):
+        response = client.get(self.TITLES_URL, {'year_min': 'девяностые'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
@@ -0,0 +1,59 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import IntegrityError, transaction
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20GenreLinks:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_links_unique(self, admin_client):
+        from reviews.models import GenreTitle
+
+        titles, _, _ = create_titles(admin_client)
+        link = GenreTitle.objects.filter(title_id=titles[0]['id']).first()
+        with pytest.raises(IntegrityError), transaction.atomic():
+            GenreTitle.objects.create(title=link.title, genre=link.genre)
+
+    def test_02_update_keeps_unchanged_links(self, admin_client):
+        from reviews.models import GenreTitle
+
+        titles, _, genres = create_titles(admin_client)
+        title_id = titles[0]['id']
+        kept = GenreTitle.objects.get(
+            title_id=title_id, genre__slug=genres[1]['slug']
+        )
+        response = admin_client.patch(
+            f'{self.TITLES_URL}{title_id}/',
+            data={'genre': [genres[1]['slug'], genres[2]['slug']]},
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        links = GenreTitle.objects.filter(title_id=title_id)
+        assert sorted(links.values_list('genre__slug', flat=True)) == sorted(
+            [genres[1]['slug'], genres[2]['slug']]
+        )
+        assert links.filter(pk=kept.pk).exists(), (
+            'Проверьте, что при смене жанров сохранившиеся связи не '
+            'пересоздаются.'
+        )
+        response = admin_client.get(f'{self.TITLES_URL}{title_id}/')
+        assert sorted(
+            genre['slug'] for genre in response.json()['genre']
+        ) == sorted([genres[1]['slug'], genres[2]['slug']])
+
+    def test_03_links_deleted_with_genre(self, admin_client):
+        from reviews.models import GenreTitle
+
+        _, _, genres = create_titles(admin_client)
+        admin_client.delete(f'/api/v1/genres/{genres[0]["slug"]}/')
+        assert not GenreTitle.objects.filter(
+            genre__slug=genres[0]['slug']
+        ).exists()
+        assert GenreTitle.objects.count() == 2, (
+            'Проверьте, что при удалении жанра удаляются только его связи.'
+        )
@@ -0,0 +1,56 @@
+import importlib
+import io
+
+import pytest
+from django.core.management import call_command
+from django.apps import apps
+from django.db import IntegrityError, connection, transaction
+
+from tests.utils import create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21ReviewsMigrations:
+
+    def test_01_migrations_match_models(self):
+        try:
+            call_command(
+                'makemigrations', 'reviews', check=True, dry_run=True,
+                stdout=io.StringIO()
+            )
+        except SystemExit:
+            pytest.fail(
+                'Проверьте, что миграции приложения `reviews` соответствуют '
+                'моделям.'
+            )
+
+    def test_02_review_unique_per_author(self, admin_client, admin):
+        from reviews.models import Review
+
+        reviews, _ = create_reviews(admin_client, {admin: admin_client})
+        review = Review.objects.get(pk=reviews[0]['id'])
+        with pytest.raises(IntegrityError), transaction.atomic():
+            Review.objects.create(
+                title=review.title, author=review.author, text='Ещё', score=1
+            )
+
+    def test_03_backfill_scores(self, admin_client, admin, monkeypatch):
+        from reviews.models import Title
+
+        create_reviews(admin_client, {admin: admin_client})
+        expected = {
+            title.pk: (title.score_sum, title.score_count, title.rating)
+            for title in Title.objects.all()
+        }
+        Title.objects.update(score_sum=0, score_count=0, rating=None)
+        migration = importlib.import_module(
+            'reviews.migrations.0002_title_scores'
+        )
+        monkeypatch.setattr(migration, 'CHUNK_SIZE', 1)
+        migration.backfill_scores(apps, connection.schema_editor())
+        assert {
+            title.pk: (title.score_sum, title.score_count, title.rating)
+            for title in Title.objects.all()
+        } == expected, (
+            'Проверьте, что миграция заполняет агрегаты оценок по отзывам.'
+        )
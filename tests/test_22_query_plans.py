@@ -0,0 +1,204 @@
+import io
+import re
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+GUARDED_TABLES = ('reviews_title', 'reviews_review', 'reviews_comment')
+# SQLite < 3.36 пишет `SCAN TABLE t [AS alias]`, новые версии — `SCAN t`.
+# Обход индекса без условия в скобках тоже читает таблицу целиком.
+FULL_SCAN = re.compile(
+    r'^SCAN (?:TABLE )?(?:\w+ AS )?(\w+)(?: USING (?:COVERING )?INDEX \w+)?$'
+)
+ALIAS = re.compile(r'"(\w+)" (U\d+)\b')
+BARE_COUNT = re.compile(r'^SELECT COUNT\(\*\) AS "__count" FROM "\w+"$')
+TEMP_SORT = 'USE TEMP B-TREE FOR ORDER BY'
+
+TITLE_FILTERS = (
+    'category=category-1',
+    'category=category-1,category-2',
+    'genre=genre-1',
+    'genre=genre-1,genre-2',
+    'genre=genre-1,genre-2&genre_match=all',
+    'year=1990',
+    'year_min=1990',
+    'year_max=1950',
+    'year_min=1990&year_max=1999',
+    'decade=1990',
+    'decade=1990&category=category-2',
+    'search=фильм',
+    'search=фильм&category=category-1',
+    'ordering=rating',
+    'ordering=-rating',
+    'ordering=year',
+    'ordering=-year',
+    'ordering=name',
+    'ordering=-name',
+    'ordering=reviews_count',
+    'ordering=-reviews_count',
+    'ordering=-rating&category=category-1',
+    'ordering=-rating&genre=genre-1',
+    'category=category-1&pagination=cursor',
+    'genre=genre-1&pagination=cursor',
+)
+# Остальные маршруты полный обход не допускают.
+ALLOWED_SCANS = {
+    # Подстрочный поиск по названию индексом не обслуживается, для этого
+    # есть `search`.
+    '/api/v1/titles/?name=фильм': {'reviews_title'},
+    # Для открытого диапазона лет SQLite без статистики ждёт большую долю
+    # строк и читает страницу обходом по id до LIMIT, а не по индексу
+    # года с сортировкой всех найденных строк.
+    '/api/v1/titles/?year_min=1990': {'reviews_title'},
+    '/api/v1/titles/?year_max=1950': {'reviews_title'},
+}
+
+
+class PlanRecorder:
+    """Запоминает SELECT-запросы, выполненные во время запроса к API."""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip().upper().startswith('SELECT'):
+            self.queries.append((sql, params))
+        return execute(sql, params, many, context)
+
+
+def explain(sql, params):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return cursor.fetchall()
+
+
+def scanned_table(detail, aliases):
+    """Таблица, которую строка плана обходит целиком, или None."""
+    match = FULL_SCAN.match(detail)
+    if match is None:
+        return None
+    return aliases.get(match.group(1), match.group(1))
+
+
+def unfiltered_scan_allowed(sql, plan):
+    """Полный обход без WHERE, который не читает всю таблицу зря.
+
+    Это голый COUNT, которому нужны все строки, или страница, которая
+    идёт по индексу в нужном порядке и останавливается на LIMIT.
+    Сортировка во временном B-дереве означает, что для страницы читаются
+    и упорядочиваются все строки таблицы.
+    """
+    if ' WHERE ' in sql:
+        return False
+    if BARE_COUNT.match(sql.strip()):
+        return True
+    return ' LIMIT ' in sql and not any(
+        detail.startswith(TEMP_SORT) for *_, detail in plan
+    )
+
+
+def check_plan(sql, plan, allowed):
+    """Недопустимые полные обходы и план в виде дерева.
+
+    Без разрешения обход допустим только для голого COUNT и для страницы,
+    которую индекс отдаёт в нужном порядке до LIMIT. Остальные обходы
+    разрешаются явно, через `ALLOWED_SCANS`. Строки с полным обходом
+    отмечены `-`, как удалённые строки в diff.
+    """
+    if unfiltered_scan_allowed(sql, plan):
+        allowed = GUARDED_TABLES
+    aliases = {alias: table for table, alias in ALIAS.findall(sql)}
+    depth = {0: -1}
+    scans = set()
+    lines = [sql]
+    for node, parent, _, detail in plan:
+        depth[node] = depth.get(parent, -1) + 1
+        table = scanned_table(detail, aliases)
+        bad = table in GUARDED_TABLES and table not in allowed
+        if bad:
+            scans.add(table)
+        lines.append(f'{"-" if bad else " "} {"  " * depth[node]}{detail}')
+    return scans, '\n'.join(lines)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22QueryPlans:
+
+    def populate(self, tmp_path, request):
+        call_command(
+            'generate_csv_data', output_dir=str(tmp_path), titles=300,
+            reviews=3000, comments=3000, users=100, stdout=io.StringIO()
+        )
+        call_command(
+            'import_from_CSV', data_dir=str(tmp_path), stdout=io.StringIO()
+        )
+        # Пользователи из набора занимают первые id, администратор — после.
+        return request.getfixturevalue('admin_client')
+
+    def check_plans(self, client, urls):
+        report = []
+        guarded_queries = 0
+        for url in urls:
+            recorder = PlanRecorder()
+            with connection.execute_wrapper(recorder):
+                response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, url
+            allowed = ALLOWED_SCANS.get(url, set())
+            for sql, params in recorder.queries:
+                if any(f'"{table}"' in sql for table in GUARDED_TABLES):
+                    guarded_queries += 1
+                scans, plan = check_plan(sql, explain(sql, params), allowed)
+                if scans:
+                    report.append(f'GET {url}\n{plan}')
+        assert guarded_queries, 'Запросы к таблицам отзывов не перехвачены.'
+        assert not report, (
+            'Полный обход таблицы в плане запроса:\n\n'
+            + '\n\n'.join(report)
+        )
+
+    def test_01_title_lists(self, tmp_path, request):
+        client = self.populate(tmp_path, request)
+        urls = [
+            '/api/v1/titles/',
+            '/api/v1/titles/?pagination=cursor',
+            '/api/v1/titles/?name=фильм',
+        ] + [f'/api/v1/titles/?{query}' for query in TITLE_FILTERS]
+        self.check_plans(client, urls)
+
+    def test_02_nested_lists_and_details(self, tmp_path, request):
+        from reviews.models import Comment, Review
+
+        client = self.populate(tmp_path, request)
+        review = Review.objects.order_by('-pk').first()
+        commented = Comment.objects.select_related('review').first().review
+        reviews_url = f'/api/v1/titles/{review.title_id}/reviews/'
+        comments_url = (
+            f'/api/v1/titles/{commented.title_id}/reviews/'
+            f'{commented.pk}/comments/'
+        )
+        comment = commented.comments.first()
+        self.check_plans(client, [
+            f'/api/v1/titles/{review.title_id}/',
+            reviews_url,
+            f'{reviews_url}?pagination=cursor',
+            f'{reviews_url}{review.pk}/',
+            comments_url,
+            f'{comments_url}?pagination=cursor',
+            f'{comments_url}{comment.pk}/',
+        ])
+
+    def test_03_reference_lists(self, tmp_path, request):
+        client = self.populate(tmp_path, request)
+        self.check_plans(client, [
+            '/api/v1/categories/',
+            '/api/v1/categories/?search=1',
+            '/api/v1/genres/',
+            '/api/v1/genres/?search=1',
+            '/api/v1/users/',
+            '/api/v1/users/?pagination=cursor',
+            '/api/v1/users/user1/',
+            '/api/v1/users/me/',
+            '/api/v1/titles/1/',
+        ])
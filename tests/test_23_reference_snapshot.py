@@ -0,0 +1,100 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_categories, create_genre, create_titles
+
+
+def slug_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'WHERE "reviews_category"."slug"' in query['sql']
+        or 'WHERE "reviews_genre"."slug"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23ReferenceSnapshot:
+
+    TITLES_URL = '/api/v1/titles/'
+
+    def test_01_slugs_resolved_without_queries(self, client, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        client.get('/api/v1/categories/')
+        client.get('/api/v1/genres/')
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(self.TITLES_URL, data={
+                'name': 'Чужой',
+                'year': 1979,
+                'genre': [genres[0]['slug'], genres[2]['slug']],
+                'category': categories[0]['slug'],
+            })
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json()['category'] == categories[0]['slug']
+        assert not slug_queries(context), (
+            'Проверьте, что slug категорий и жанров разрешаются по снимку '
+            'без запросов к базе.'
+        )
+        # Другой URL, чтобы ответ не пришёл из кэша ответов.
+        with CaptureQueriesContext(connection) as context:
+            response = client.get('/api/v1/categories/?page=1')
+        assert response.json()['results'] == categories
+        assert not any(
+            '"reviews_category"' in query['sql']
+            for query in context.captured_queries
+        ), 'Проверьте, что список категорий отдаётся из снимка.'
+
+    def test_02_other_worker_changes_seen(self, admin_client, settings):
+        from api.serializers import category_snapshot
+        from reviews.models import Category
+        from reviews.versions import bump_versions
+
+        categories = create_categories(admin_client)
+        settings.REFERENCE_SNAPSHOT_CHECK_INTERVAL = 60
+        category_snapshot.get(force_check=True)
+        # Запись другого воркера: без сигналов в этом процессе.
+        Category.objects.filter(slug=categories[0]['slug']).update(
+            name='Кино'
+        )
+        bump_versions(Category)
+        assert category_snapshot.by_slug(categories[0]['slug']).name == (
+            categories[0]['name']
+        ), 'Между проверками версии снимок не должен перечитываться.'
+        settings.REFERENCE_SNAPSHOT_CHECK_INTERVAL = 0
+        assert category_snapshot.by_slug(categories[0]['slug']).name == (
+            'Кино'
+        ), 'Проверьте, что снимок перечитывается при смене версии модели.'
+
+    def test_03_slug_miss_checks_version(self, admin_client, settings):
+        from api.serializers import category_snapshot
+        from reviews.models import Category
+        from reviews.versions import bump_versions
+
+        genres = create_genre(admin_client)
+        create_categories(admin_client)
+        settings.REFERENCE_SNAPSHOT_CHECK_INTERVAL = 60
+        category_snapshot.get(force_check=True)
+        Category.objects.bulk_create([Category(name='Игры', slug='games')])
+        bump_versions(Category)
+        response = admin_client.post(self.TITLES_URL, data={
+            'name': 'Дум',
+            'year': 1993,
+            'genre': [genres[0]['slug']],
+            'category': 'games',
+        })
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что при промахе по slug снимок сверяет версию '
+            'немедленно.'
+        )
+
+    def test_04_update_returns_new_genres(self, admin_client):
+        titles, _, genres = create_titles(admin_client)
+        response = admin_client.patch(
+            f'{self.TITLES_URL}{titles[0]["id"]}/',
+            data={'genre': [genres[2]['slug']]}, format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['genre'] == [genres[2]['slug']]
@@ -0,0 +1,66 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_single_review, create_titles
+
+
+def queries_to(context, table, marker=''):
+    """SELECT к таблице; marker сужает выборку по тексту запроса."""
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].startswith('SELECT')
+        and f'FROM "{table}"' in query['sql'] and marker in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24RequestMemo:
+
+    def test_01_token_user_loaded_once(self, client, user, settings):
+        settings.REQUEST_MEMO_HEADER = True
+        user.confirmation_code = '123456'
+        user.save()
+        with CaptureQueriesContext(connection) as context:
+            response = client.post('/api/v1/auth/token/', data={
+                'username': user.username, 'confirmation_code': '123456'
+            })
+        assert response.status_code == HTTPStatus.OK
+        assert response['X-Memo-Hits'] == '1'
+        assert len(queries_to(context, 'users_user')) == 1, (
+            'Проверьте, что пользователь читается один раз за запрос.'
+        )
+
+    def test_02_header_disabled(self, admin_client, settings):
+        settings.REQUEST_MEMO_HEADER = False
+        titles, _, _ = create_titles(admin_client)
+        response = admin_client.get(
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert 'X-Memo-Hits' not in response
+
+    def test_03_review_create_without_extra_queries(self, admin_client,
+                                                    user_client, settings):
+        settings.REQUEST_MEMO_HEADER = True
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(url, data={'text': 'Ок', 'score': 6})
+        assert response.status_code == HTTPStatus.CREATED
+        assert response['X-Memo-Hits'] == '0'
+        # Обновление витрины после коммита читает произведения отдельно.
+        assert len(queries_to(context, 'reviews_title', 'LIMIT 21')) == 1
+        assert not queries_to(context, 'reviews_review', 'LIMIT 1'), (
+            'Проверьте, что повторный отзыв отсекает уникальный индекс, '
+            'а не отдельный запрос.'
+        )
+
+        response = user_client.post(url, data={'text': 'Ещё', 'score': 7})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert response.json() == {
+            'non_field_errors': ['Вы уже оставили отзыв на это произведение.']
+        }
+        create_single_review(admin_client, titles[0]['id'], 'Хорошо', 8)
@@ -0,0 +1,145 @@
+import io
+from http import HTTPStatus
+
+import pytest
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+def stateless_client(access):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+    return client
+
+
+def obtain_access(user):
+    type(user).objects.filter(pk=user.pk).update(confirmation_code='123456')
+    response = APIClient().post('/api/v1/auth/token/', data={
+        'username': user.username, 'confirmation_code': '123456'
+    })
+    assert response.status_code == HTTPStatus.OK
+    return response.json()['access']
+
+
+def user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "users_user"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25StatelessAuth:
+
+    def test_01_token_claims(self, admin):
+        token = AccessToken(obtain_access(admin))
+        assert token['user_id'] == admin.pk
+        assert token['username'] == admin.username
+        assert token['role'] == admin.role
+        assert token['is_superuser'] is False
+        assert token['ver'] == admin.token_version
+
+    def test_02_no_user_query(self, admin):
+        client = stateless_client(obtain_access(admin))
+        client.get('/api/v1/categories/')
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(
+                '/api/v1/categories/', data={'name': 'Фильм', 'slug': 'films'}
+            )
+        assert response.status_code == HTTPStatus.CREATED
+        assert not user_queries(context), (
+            'Проверьте, что пользователь с токеном из `/api/v1/auth/token/` '
+            'не читается из базы.'
+        )
+
+    def test_03_me_loads_full_user(self, user):
+        client = stateless_client(obtain_access(user))
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['email'] == user.email
+        assert response.json()['bio'] == user.bio
+
+        response = client.patch(
+            '/api/v1/users/me/', data={'bio': 'Новое'}, format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        user.refresh_from_db()
+        assert user.bio == 'Новое'
+        assert user.email == 'testuser@yamdb.fake'
+
+    def test_04_role_change_revokes_token(self, admin_client, user):
+        client = stateless_client(obtain_access(user))
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'moderator'},
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что смена роли отзывает выданные токены.'
+        )
+        response = stateless_client(obtain_access(user)).get(
+            '/api/v1/users/me/'
+        )
+        assert response.json()['role'] == 'moderator'
+
+    def test_05_revoke_and_delete(self, user, admin):
+        client = stateless_client(obtain_access(user))
+        user.refresh_from_db()
+        user.revoke_tokens()
+        assert client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        client = stateless_client(obtain_access(admin))
+        assert client.get('/api/v1/users/').status_code == HTTPStatus.OK
+        admin.delete()
+        assert client.get('/api/v1/users/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+
+    def test_06_unrelated_save_keeps_token(self, user):
+        client = stateless_client(obtain_access(user))
+        user.refresh_from_db()
+        user.bio = 'Другое'
+        user.save()
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+
+    def test_07_stale_version_overwritten_on_commit(self, user):
+        from users.tokens import token_version_key
+
+        client = stateless_client(obtain_access(user))
+        user.refresh_from_db()
+        version = user.token_version
+        with transaction.atomic():
+            user.revoke_tokens()
+        # Параллельный запрос прочитал версию из базы до коммита, а в кэш
+        # кладёт её уже после.
+        cache.add(token_version_key(user.pk), version)
+        assert client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что отзыв токенов не теряется из-за гонки с кэшем.'
+
+    def test_08_upsert_demotion_revokes_token(self, admin, tmp_path):
+        from django.core.management import call_command
+
+        client = stateless_client(obtain_access(admin))
+        assert client.get('/api/v1/users/').status_code == HTTPStatus.OK
+        (tmp_path / 'users.csv').write_text(
+            'id,username,email,role,bio,first_name,last_name\n'
+            f'{admin.pk},{admin.username},{admin.email},user,,,\n',
+            encoding='utf-8'
+        )
+        call_command(
+            'import_from_CSV', data_dir=str(tmp_path), tables=['user'],
+            upsert=True, stdout=io.StringIO()
+        )
+        assert client.get('/api/v1/users/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что смена роли при импорте с `--upsert` отзывает '
+            'выданные токены.'
+        )
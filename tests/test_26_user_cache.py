@@ -0,0 +1,133 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "users_user"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26UserCache:
+
+    def test_01_auth_served_from_cache(self, user_client):
+        assert user_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.OK
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.OK
+        assert not user_queries(context), (
+            'Проверьте, что повторный запрос берёт пользователя из кэша.'
+        )
+
+    def test_02_save_invalidates(self, admin_client, user_client, user):
+        assert user_client.get('/api/v1/users/me/').json()['bio'] == (
+            user.bio
+        )
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'bio': 'Новое'},
+            format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get('/api/v1/users/me/').json()['bio'] == 'Новое'
+        assert admin_client.get(
+            f'/api/v1/users/{user.username}/'
+        ).json()['bio'] == 'Новое'
+
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert user_client.get('/api/v1/users/me/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+
+    def test_03_generation_from_other_process(self, user, settings):
+        from users.cache import bump_generation, user_cache
+        settings.USER_CACHE_CHECK_INTERVAL = 60
+        user_cache.by_id(user.pk, force_check=True)
+        # QuerySet.update() сигналов не шлёт — как запись в другом воркере.
+        type(user).objects.filter(pk=user.pk).update(bio='Другое')
+        bump_generation()
+        assert user_cache.by_id(user.pk).bio == user.bio
+        assert user_cache.by_id(user.pk, force_check=True).bio == 'Другое'
+
+    def test_04_lru_and_ttl(self, user, admin, moderator, settings):
+        from users.cache import user_cache
+        settings.USER_CACHE_SIZE = 2
+        user_cache.by_id(user.pk)
+        user_cache.by_id(admin.pk)
+        user_cache.by_id(user.pk)
+        stats = user_cache.stats()
+        user_cache.by_username(moderator.username)
+        assert user_cache.stats()['evictions'] == stats['evictions'] + 1
+        assert user_cache.stats()['size'] == 2
+        with CaptureQueriesContext(connection) as context:
+            assert user_cache.by_id(user.pk) == user
+        assert not context.captured_queries, (
+            'Проверьте, что вытесняется давно использованный пользователь.'
+        )
+        with CaptureQueriesContext(connection) as context:
+            assert user_cache.by_id(admin.pk) == admin
+        assert len(context.captured_queries) == 1
+
+        settings.USER_CACHE_TIMEOUT = -1
+        user_cache.invalidate(user.pk)
+        user_cache.by_id(user.pk)
+        misses = user_cache.stats()['misses']
+        user_cache.by_id(user.pk)
+        assert user_cache.stats()['misses'] == misses + 1
+        assert user_cache.by_username('missing') is None
+
+    def test_05_metrics(self, admin_client):
+        admin_client.get('/api/v1/users/')
+        response = admin_client.get('/api/v1/metrics')
+        assert response.status_code == HTTPStatus.OK
+        content = response.content.decode()
+        for name in ('hits_total', 'misses_total', 'evictions_total',
+                     'size'):
+            assert f'yamdb_user_cache_{name} ' in content
+
+    def test_06_force_check_reads_database(self, user, user_client):
+        from users.cache import user_cache
+
+        user_cache.by_id(user.pk)
+        # Запись мимо сигналов и без сдвига поколения.
+        type(user).objects.filter(pk=user.pk).update(
+            bio='Мимо кэша', confirmation_code='654321'
+        )
+        assert user_cache.by_id(user.pk).bio == user.bio
+        assert user_cache.by_id(user.pk, force_check=True).bio == 'Мимо кэша'
+        assert user_cache.by_id(user.pk).bio == 'Мимо кэша', (
+            'Проверьте, что чтение с `force_check` обновляет строку в кэше.'
+        )
+
+        type(user).objects.filter(pk=user.pk).update(bio='Ещё раз')
+        response = user_client.patch(
+            '/api/v1/users/me/', data={'first_name': 'Имя'}, format='json'
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['bio'] == 'Ещё раз', (
+            'Проверьте, что изменение пользователя не затирает данные '
+            'устаревшей строкой из кэша.'
+        )
+
+    def test_07_retrieve_served_from_cache(self, admin_client, user):
+        url = f'/api/v1/users/{user.username}/'
+        assert admin_client.get(url).status_code == HTTPStatus.OK
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert not user_queries(context), (
+            'Проверьте, что GET-запрос к пользователю берёт его из кэша.'
+        )
+        # Запись мимо сигналов: изменение читает строку из базы.
+        type(user).objects.filter(pk=user.pk).update(bio='Мимо кэша')
+        response = admin_client.patch(
+            url, data={'first_name': 'Имя'}, format='json'
+        )
+        assert response.json()['bio'] == 'Мимо кэша'
@@ -0,0 +1,137 @@
+import io
+import smtplib
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+BACKEND_PATH = 'tests.test_27_email_queue.'
+
+
+class CountingBackend(EmailBackend):
+    instances = []
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sent = 0
+        CountingBackend.instances.append(self)
+
+    def send_messages(self, messages):
+        self.sent += len(messages)
+        return super().send_messages(messages)
+
+
+class FailingBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        raise smtplib.SMTPServerDisconnected('Сервер недоступен')
+
+
+def signup(client, number):
+    return client.post('/api/v1/auth/signup/', data={
+        'username': f'queued{number}', 'email': f'queued{number}@yamdb.fake'
+    })
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27EmailQueue:
+
+    def test_01_signup_enqueues(self, client, settings):
+        from users.models import QueuedEmail
+        settings.EMAIL_QUEUE_EAGER = False
+        outbox_before = len(mail.outbox)
+        response = signup(client, 1)
+        assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == outbox_before, (
+            'Проверьте, что регистрация не отправляет письмо в запросе.'
+        )
+        queued = QueuedEmail.objects.get()
+        assert queued.to == 'queued1@yamdb.fake'
+        assert queued.status == QueuedEmail.PENDING
+
+        call_command('send_queued_emails', '--once', stdout=io.StringIO())
+        assert len(mail.outbox) == outbox_before + 1
+        assert mail.outbox[-1].to == ['queued1@yamdb.fake']
+        assert not QueuedEmail.objects.exists()
+
+    def test_02_connection_reused(self, client, settings):
+        from users.models import QueuedEmail
+        settings.EMAIL_QUEUE_EAGER = False
+        settings.EMAIL_BACKEND = BACKEND_PATH + 'CountingBackend'
+        for number in range(6):
+            signup(client, number)
+        CountingBackend.instances.clear()
+        call_command(
+            'send_queued_emails', '--once', '--workers=2', '--batch-size=4',
+            stdout=io.StringIO()
+        )
+        assert not QueuedEmail.objects.exists()
+        # Две пачки по два куска, но соединений не больше, чем потоков.
+        assert 1 <= len(CountingBackend.instances) <= 2, (
+            'Проверьте, что каждый поток отправки держит одно соединение.'
+        )
+        assert sum(
+            backend.sent for backend in CountingBackend.instances
+        ) == 6
+
+    def test_03_retry_with_backoff(self, client, settings):
+        from users.models import QueuedEmail
+        settings.EMAIL_QUEUE_EAGER = False
+        settings.EMAIL_QUEUE_MAX_ATTEMPTS = 2
+        settings.EMAIL_BACKEND = BACKEND_PATH + 'FailingBackend'
+        signup(client, 1)
+        call_command('send_queued_emails', '--once', stdout=io.StringIO())
+        queued = QueuedEmail.objects.get()
+        assert queued.status == QueuedEmail.PENDING
+        assert queued.attempts == 1
+        assert 'SMTPServerDisconnected' in queued.last_error
+        delay = queued.next_attempt_at - timezone.now()
+        assert timedelta(seconds=25) < delay <= timedelta(
+            seconds=settings.EMAIL_QUEUE_RETRY_DELAY
+        )
+
+        call_command('send_queued_emails', '--once', stdout=io.StringIO())
+        assert QueuedEmail.objects.get().attempts == 1, (
+            'Проверьте, что повтор ждёт своего времени.'
+        )
+        QueuedEmail.objects.update(next_attempt_at=timezone.now())
+        call_command('send_queued_emails', '--once', stdout=io.StringIO())
+        queued = QueuedEmail.objects.get()
+        assert queued.attempts == 2
+        assert queued.status == QueuedEmail.FAILED
+
+    def test_04_queue_depth_metrics(self, client, admin_client, settings):
+        settings.EMAIL_QUEUE_EAGER = False
+        signup(client, 1)
+        signup(client, 2)
+        response = admin_client.get('/api/v1/metrics')
+        content = response.content.decode()
+        assert 'yamdb_email_queue_depth{status="pending"} 2' in content
+        assert 'yamdb_email_queue_depth{status="failed"} 0' in content
+        assert 'yamdb_email_queue_oldest_seconds ' in content
+
+    def test_05_claim_is_exclusive(self, client, settings, monkeypatch):
+        from users import mail
+        settings.EMAIL_QUEUE_EAGER = False
+        signup(client, 1)
+        signup(client, 2)
+        claim = mail.claim
+        rival = []
+
+        def contended(queued, now, lease):
+            if not rival:
+                # Другой воркер забирает те же письма между чтением и UPDATE.
+                rival.append(None)
+                rival.extend(mail.claim_batch(10))
+            return claim(queued, now, lease)
+
+        monkeypatch.setattr(mail, 'claim', contended)
+        assert mail.claim_batch(10) == [], (
+            'Проверьте, что письма, забранные другим воркером, не '
+            'отправляются повторно.'
+        )
+        assert len(rival) == 3
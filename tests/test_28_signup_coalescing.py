@@ -0,0 +1,75 @@
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+URL_SIGNUP = '/api/v1/auth/signup/'
+DATA = {'username': 'flaky', 'email': 'flaky@yamdb.fake'}
+
+
+def writes(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if query['sql'].split()[0] in ('INSERT', 'UPDATE', 'DELETE')
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28SignupCoalescing:
+
+    def test_01_repeat_reuses_code(self, client, django_user_model):
+        outbox_before = len(mail.outbox)
+        assert client.post(URL_SIGNUP, data=DATA).status_code == (
+            HTTPStatus.OK
+        )
+        code = django_user_model.objects.get(username='flaky').confirmation_code
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(URL_SIGNUP, data=DATA)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json() == DATA
+        assert not writes(context), (
+            'Проверьте, что повторная регистрация в окне не пишет в базу.'
+        )
+        assert len(mail.outbox) == outbox_before + 1, (
+            'Проверьте, что повторная регистрация в окне не отправляет '
+            'новое письмо.'
+        )
+        user = django_user_model.objects.get(username='flaky')
+        assert user.confirmation_code == code
+
+    def test_02_after_window(self, client, django_user_model):
+        outbox_before = len(mail.outbox)
+        client.post(URL_SIGNUP, data=DATA)
+        cache.clear()
+        client.post(URL_SIGNUP, data=DATA)
+        assert len(mail.outbox) == outbox_before + 2
+        assert django_user_model.objects.filter(username='flaky').count() == 1
+
+    def test_03_deleted_user(self, client, django_user_model):
+        client.post(URL_SIGNUP, data=DATA)
+        django_user_model.objects.get(username='flaky').delete()
+        outbox_before = len(mail.outbox)
+        assert client.post(URL_SIGNUP, data=DATA).status_code == (
+            HTTPStatus.OK
+        )
+        assert django_user_model.objects.filter(username='flaky').exists()
+        assert len(mail.outbox) == outbox_before + 1
+
+    def test_04_failure_releases_window(self, client, monkeypatch):
+        from api import views
+
+        def broken(*args, **kwargs):
+            raise RuntimeError('Очередь недоступна')
+
+        with monkeypatch.context() as patch:
+            patch.setattr(views, 'enqueue_email', broken)
+            with pytest.raises(RuntimeError):
+                client.post(URL_SIGNUP, data=DATA)
+        outbox_before = len(mail.outbox)
+        client.post(URL_SIGNUP, data=DATA)
+        assert len(mail.outbox) == outbox_before + 1, (
+            'Проверьте, что неудачная регистрация не занимает окно склейки.'
+        )